@@ -1,5 +1,5 @@
 import json
-from typing import List
+from typing import List, Optional, Tuple
 from Task import Task
 
 
@@ -8,22 +8,34 @@ class JSONStorage:
     Класс для работы с хранилищем задач в формате JSON
     """
 
-    def save(self, tasks: List[Task], filename: str) -> bool:
+    def save(self, tasks: List[Task], filename: str,
+             dependencies: Optional[List[Tuple[int, int]]] = None) -> bool:
         """
         Сохраняет список задач в JSON-файл
 
+        Если переданы зависимости, файл сохраняется в виде объекта
+        {"tasks": [...], "dependencies": [[blocker_id, task_id], ...]}.
+
         Args:
             tasks: Список задач для сохранения
             filename: Имя файла для сохранения
+            dependencies: Пары (блокирующая задача, блокируемая задача) (опционально)
 
         Returns:
             bool: True если сохранение успешно, False в случае ошибки
         """
         try:
             tasks_data = [task.to_dict() for task in tasks]
+            if dependencies is not None:
+                data = {
+                    'tasks': tasks_data,
+                    'dependencies': [list(edge) for edge in dependencies]
+                }
+            else:
+                data = tasks_data
 
             with open(filename, 'w', encoding='utf-8') as file:
-                json.dump(tasks_data, file, ensure_ascii=False, indent=4)
+                json.dump(data, file, ensure_ascii=False, indent=4)
 
             print(f"Задачи успешно сохранены в файл: {filename}")
             return True
@@ -42,21 +54,44 @@ class JSONStorage:
         Returns:
             List[Task]: Список загруженных задач
         """
+        tasks, _ = self.load_with_dependencies(filename)
+        return tasks
+
+    def load_with_dependencies(self, filename: str) -> Tuple[List[Task], List[Tuple[int, int]]]:
+        """
+        Загружает задачи и зависимости между ними из JSON-файла
+
+        Поддерживает как старый формат (список задач), так и объект с зависимостями.
+
+        Args:
+            filename: Имя файла для загрузки
+
+        Returns:
+            Tuple[List[Task], List[Tuple[int, int]]]: Задачи и пары
+            (блокирующая задача, блокируемая задача)
+        """
         try:
             with open(filename, 'r', encoding='utf-8') as file:
-                tasks_data = json.load(file)
+                data = json.load(file)
+
+            if isinstance(data, dict):
+                tasks_data = data.get('tasks', [])
+                dependencies = [(blocker_id, task_id) for blocker_id, task_id in data.get('dependencies', [])]
+            else:
+                tasks_data = data
+                dependencies = []
 
             tasks = [Task.from_dict(task_data) for task_data in tasks_data]
 
             print(f"Задачи успешно загружены из файла: {filename}")
-            return tasks
+            return tasks, dependencies
 
         except FileNotFoundError:
             print(f"Файл {filename} не найден. Возвращен пустой список.")
-            return []
+            return [], []
         except json.JSONDecodeError:
             print(f"Ошибка чтения JSON из файла {filename}. Возвращен пустой список.")
-            return []
+            return [], []
         except Exception as e:
             print(f"Ошибка при загрузке задач из файла {filename}: {e}")
-            return []
+            return [], []
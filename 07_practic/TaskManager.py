@@ -87,3 +87,29 @@ class DeleteTaskCommand(Command):
         Выполняет команду удаления задачи
         """
         self.manager.delete_task(self.task_id)
+
+
+class AddDependencyCommand(Command):
+    """
+    Команда для добавления зависимости между задачами
+    """
+
+    def __init__(self, manager: TodoManager, blocker_id: int, task_id: int):
+        """
+        Конструктор команды добавления зависимости
+
+        Args:
+            manager: Менеджер задач
+            blocker_id: ID блокирующей задачи
+            task_id: ID блокируемой задачи
+        """
+        self.manager = manager
+        self.blocker_id = blocker_id
+        self.task_id = task_id
+        self.result = False
+
+    def execute(self) -> None:
+        """
+        Выполняет команду добавления зависимости
+        """
+        self.result = self.manager.add_dependency(self.blocker_id, self.task_id)
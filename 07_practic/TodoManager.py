@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Dict, List, Optional, Set, Tuple
 from Task import Task, TaskStatus
 from Storage import JSONStorage
 from Logger import Observer
@@ -30,8 +30,44 @@ class TodoManager:
             self.observers: List[Observer] = []
             self.filename = "tasks.json"
             self.next_id = 1
+            self._reset_graph()
             TodoManager._initialized = True
 
+    def _reset_graph(self) -> None:
+        """
+        Сбрасывает индекс задач и граф зависимостей
+
+        Граф хранится в виде списков смежности в обе стороны:
+        blocked_by[b] - задачи, блокирующие b; blocks[a] - задачи, которые блокирует a.
+        order - топологический порядок (номер позиции для каждой задачи),
+        поддерживаемый инкрементально при добавлении рёбер.
+        pending_blockers[b] - число незавершённых задач, блокирующих b.
+        ready - незавершённые задачи, у которых все зависимости выполнены.
+        """
+        self.task_index: Dict[int, Task] = {}
+        self.blocked_by: Dict[int, Set[int]] = {}
+        self.blocks: Dict[int, Set[int]] = {}
+        self.order: Dict[int, int] = {}
+        self.next_order = 0
+        self.pending_blockers: Dict[int, int] = {}
+        self.ready: Set[int] = set()
+
+    def _register_task(self, task: Task) -> None:
+        """
+        Добавляет задачу в индекс и граф как вершину без рёбер
+
+        Args:
+            task: Задача для регистрации
+        """
+        self.task_index[task.id] = task
+        self.blocked_by[task.id] = set()
+        self.blocks[task.id] = set()
+        self.order[task.id] = self.next_order
+        self.next_order += 1
+        self.pending_blockers[task.id] = 0
+        if task.status != TaskStatus.COMPLETED:
+            self.ready.add(task.id)
+
     def add_observer(self, observer: Observer) -> None:
         """
         Добавляет observer в список observers
@@ -77,6 +113,7 @@ class TodoManager:
         task.id = self.next_id
         self.next_id += 1
         self.tasks.append(task)
+        self._register_task(task)
         self.notify_observers("Task created", task)
         return task
 
@@ -90,10 +127,7 @@ class TodoManager:
         Returns:
             Optional[Task]: Найденная задача или None
         """
-        for task in self.tasks:
-            if task.id == task_id:
-                return task
-        return None
+        return self.task_index.get(task_id)
 
     def update_task_status(self, task_id: int, status: TaskStatus) -> bool:
         """
@@ -110,6 +144,7 @@ class TodoManager:
         if task:
             old_status = task.status
             task.update_status(status)
+            self._on_status_changed(task_id, old_status, status)
             self.notify_observers(f"Task status updated from {old_status.value} to {status.value}", task)
             return True
         return False
@@ -126,6 +161,16 @@ class TodoManager:
         """
         task = self.get_task(task_id)
         if task:
+            for blocker_id in list(self.blocked_by[task_id]):
+                self._unlink(blocker_id, task_id)
+            for dependent_id in list(self.blocks[task_id]):
+                self._unlink(task_id, dependent_id)
+            del self.task_index[task_id]
+            del self.blocked_by[task_id]
+            del self.blocks[task_id]
+            del self.order[task_id]
+            del self.pending_blockers[task_id]
+            self.ready.discard(task_id)
             self.tasks.remove(task)
             self.notify_observers("Task deleted", task)
             return True
@@ -159,7 +204,7 @@ class TodoManager:
         Returns:
             bool: True если успешно, False при ошибке
         """
-        success = self.storage.save(self.tasks, self.filename)
+        success = self.storage.save(self.tasks, self.filename, self.get_dependencies())
         if success:
             self.notify_observers("Tasks saved to file")
         else:
@@ -173,11 +218,232 @@ class TodoManager:
         Returns:
             bool: True если успешно, False при ошибке
         """
-        loaded_tasks = self.storage.load(self.filename)
+        loaded_tasks, dependencies = self.storage.load_with_dependencies(self.filename)
         if loaded_tasks:
             self.tasks = loaded_tasks
+            self._reset_graph()
+            for task in self.tasks:
+                self._register_task(task)
+            for blocker_id, task_id in dependencies:
+                if blocker_id in self.task_index and task_id in self.task_index:
+                    self._link(blocker_id, task_id)
             if self.tasks:
                 self.next_id = max(task.id for task in self.tasks) + 1
             self.notify_observers("Tasks loaded from file")
             return True
         return False
+
+    def add_dependency(self, blocker_id: int, task_id: int) -> bool:
+        """
+        Добавляет зависимость "задача task_id заблокирована задачей blocker_id"
+
+        Цикл проверяется инкрементально (алгоритм Pearce-Kelly): если ребро
+        не нарушает текущий топологический порядок, проверка занимает O(1),
+        иначе обходится только участок графа между позициями двух задач.
+
+        Args:
+            blocker_id: ID блокирующей задачи
+            task_id: ID блокируемой задачи
+
+        Returns:
+            bool: True если зависимость добавлена, False если задачи не найдены
+                  или ребро образует цикл
+        """
+        if blocker_id not in self.task_index or task_id not in self.task_index:
+            return False
+        if blocker_id in self.blocked_by[task_id]:
+            return True
+        if not self._link(blocker_id, task_id):
+            self.notify_observers(f"Dependency {blocker_id} -> {task_id} rejected: cycle")
+            return False
+        self.notify_observers(f"Dependency added: {blocker_id} -> {task_id}", self.task_index[task_id])
+        return True
+
+    def remove_dependency(self, blocker_id: int, task_id: int) -> bool:
+        """
+        Удаляет зависимость между задачами
+
+        Args:
+            blocker_id: ID блокирующей задачи
+            task_id: ID блокируемой задачи
+
+        Returns:
+            bool: True если зависимость удалена, False если её не было
+        """
+        if task_id not in self.blocked_by or blocker_id not in self.blocked_by[task_id]:
+            return False
+        self._unlink(blocker_id, task_id)
+        self.notify_observers(f"Dependency removed: {blocker_id} -> {task_id}", self.task_index[task_id])
+        return True
+
+    def get_dependencies(self) -> List[Tuple[int, int]]:
+        """
+        Возвращает все зависимости в виде пар (блокирующая задача, блокируемая задача)
+
+        Returns:
+            List[Tuple[int, int]]: Список рёбер графа зависимостей
+        """
+        return [(blocker_id, task_id)
+                for task_id, blockers in self.blocked_by.items()
+                for blocker_id in blockers]
+
+    def get_ready_tasks(self) -> List[Task]:
+        """
+        Возвращает незавершённые задачи, у которых выполнены все зависимости
+
+        Returns:
+            List[Task]: Готовые к выполнению задачи в топологическом порядке
+        """
+        return [self.task_index[task_id] for task_id in sorted(self.ready, key=self.order.__getitem__)]
+
+    def get_topological_order(self) -> List[Task]:
+        """
+        Возвращает все задачи в порядке, в котором их можно выполнять
+
+        Порядок поддерживается при добавлении зависимостей, поэтому экспорт
+        сводится к сортировке по уже известным позициям.
+
+        Returns:
+            List[Task]: Список задач, где каждая задача идёт после своих блокирующих
+        """
+        return sorted(self.tasks, key=lambda task: self.order[task.id])
+
+    def _link(self, blocker_id: int, task_id: int) -> bool:
+        """
+        Добавляет ребро графа, поддерживая топологический порядок и готовность
+
+        Args:
+            blocker_id: ID блокирующей задачи
+            task_id: ID блокируемой задачи
+
+        Returns:
+            bool: True если ребро добавлено, False если оно образует цикл
+        """
+        if blocker_id == task_id:
+            return False
+        if blocker_id in self.blocked_by[task_id]:
+            return True
+
+        lower = self.order[task_id]
+        upper = self.order[blocker_id]
+        if lower < upper:
+            forward = self._collect_forward(task_id, upper, blocker_id)
+            if forward is None:
+                return False
+            backward = self._collect_backward(blocker_id, lower)
+            self._reorder(backward, forward)
+
+        self.blocked_by[task_id].add(blocker_id)
+        self.blocks[blocker_id].add(task_id)
+        if self.task_index[blocker_id].status != TaskStatus.COMPLETED:
+            self.pending_blockers[task_id] += 1
+            self.ready.discard(task_id)
+        return True
+
+    def _unlink(self, blocker_id: int, task_id: int) -> None:
+        """
+        Удаляет ребро графа и пересчитывает готовность блокируемой задачи
+
+        Args:
+            blocker_id: ID блокирующей задачи
+            task_id: ID блокируемой задачи
+        """
+        self.blocked_by[task_id].discard(blocker_id)
+        self.blocks[blocker_id].discard(task_id)
+        if self.task_index[blocker_id].status != TaskStatus.COMPLETED:
+            self.pending_blockers[task_id] -= 1
+            if (self.pending_blockers[task_id] == 0 and
+                    self.task_index[task_id].status != TaskStatus.COMPLETED):
+                self.ready.add(task_id)
+
+    def _on_status_changed(self, task_id: int, old_status: TaskStatus, status: TaskStatus) -> None:
+        """
+        Обновляет множество готовых задач после смены статуса
+
+        Затрагиваются только сама задача и задачи, которые она блокирует.
+
+        Args:
+            task_id: ID задачи
+            old_status: Предыдущий статус
+            status: Новый статус
+        """
+        was_completed = old_status == TaskStatus.COMPLETED
+        is_completed = status == TaskStatus.COMPLETED
+        if was_completed == is_completed:
+            return
+
+        if is_completed:
+            self.ready.discard(task_id)
+            for dependent_id in self.blocks[task_id]:
+                self.pending_blockers[dependent_id] -= 1
+                if (self.pending_blockers[dependent_id] == 0 and
+                        self.task_index[dependent_id].status != TaskStatus.COMPLETED):
+                    self.ready.add(dependent_id)
+        else:
+            if self.pending_blockers[task_id] == 0:
+                self.ready.add(task_id)
+            for dependent_id in self.blocks[task_id]:
+                self.pending_blockers[dependent_id] += 1
+                self.ready.discard(dependent_id)
+
+    def _collect_forward(self, start_id: int, upper: int, target_id: int) -> Optional[List[int]]:
+        """
+        Обходит потомков start_id с позицией не больше upper
+
+        Args:
+            start_id: Задача, с которой начинается обход
+            upper: Верхняя граница позиции в топологическом порядке
+            target_id: Задача, достижение которой означает цикл
+
+        Returns:
+            Optional[List[int]]: Посещённые задачи или None, если найден цикл
+        """
+        visited = {start_id}
+        stack = [start_id]
+        while stack:
+            node = stack.pop()
+            for child in self.blocks[node]:
+                if child == target_id:
+                    return None
+                if child not in visited and self.order[child] < upper:
+                    visited.add(child)
+                    stack.append(child)
+        return list(visited)
+
+    def _collect_backward(self, start_id: int, lower: int) -> List[int]:
+        """
+        Обходит предков start_id с позицией больше lower
+
+        Args:
+            start_id: Задача, с которой начинается обход
+            lower: Нижняя граница позиции в топологическом порядке
+
+        Returns:
+            List[int]: Посещённые задачи
+        """
+        visited = {start_id}
+        stack = [start_id]
+        while stack:
+            node = stack.pop()
+            for parent in self.blocked_by[node]:
+                if parent not in visited and self.order[parent] > lower:
+                    visited.add(parent)
+                    stack.append(parent)
+        return list(visited)
+
+    def _reorder(self, backward: List[int], forward: List[int]) -> None:
+        """
+        Переставляет затронутые задачи: сначала предки, затем потомки
+
+        Задачи переиспользуют те же позиции, поэтому остальной порядок не меняется.
+
+        Args:
+            backward: Предки блокирующей задачи (включая её саму)
+            forward: Потомки блокируемой задачи (включая её саму)
+        """
+        backward.sort(key=self.order.__getitem__)
+        forward.sort(key=self.order.__getitem__)
+        nodes = backward + forward
+        positions = sorted(self.order[node] for node in nodes)
+        for node, position in zip(nodes, positions):
+            self.order[node] = position
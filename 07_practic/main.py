@@ -2,7 +2,7 @@
 
 from TodoManager import TodoManager
 from Logger import TaskLogger
-from TaskManager import AddTaskCommand, UpdateStatusCommand, DeleteTaskCommand
+from TaskManager import AddTaskCommand, UpdateStatusCommand, DeleteTaskCommand, AddDependencyCommand
 from Task import TaskStatus
 
 
@@ -30,7 +30,10 @@ class TodoApp:
         print("5. Показать задачи по статусу")
         print("6. Сохранить в файл")
         print("7. Загрузить из файла")
-        print("8. Выход")
+        print("8. Добавить зависимость между задачами")
+        print("9. Показать готовые к выполнению задачи")
+        print("10. Показать порядок выполнения задач")
+        print("11. Выход")
         print("====================")
 
     def display_tasks(self, tasks) -> None:
@@ -163,6 +166,26 @@ class TodoApp:
                     print("Ошибка при загрузке задач.")
 
             elif choice == "8":
+                try:
+                    blocker_id = int(input("Введите ID блокирующей задачи: ").strip())
+                    task_id = int(input("Введите ID задачи, которую она блокирует: ").strip())
+
+                    command = AddDependencyCommand(self.manager, blocker_id, task_id)
+                    command.execute()
+                    if command.result:
+                        print("Зависимость добавлена!")
+                    else:
+                        print("Ошибка: задачи не найдены или зависимость образует цикл.")
+                except ValueError:
+                    print("Ошибка: ID задачи должен быть числом.")
+
+            elif choice == "9":
+                self.display_tasks(self.manager.get_ready_tasks())
+
+            elif choice == "10":
+                self.display_tasks(self.manager.get_topological_order())
+
+            elif choice == "11":
                 print("Спасибо за использование Todo приложения! До свидания!")
                 break
 
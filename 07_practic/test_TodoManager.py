@@ -0,0 +1,169 @@
+"""
+Тесты графа зависимостей TodoManager: циклы, топологический порядок,
+множество готовых задач и сохранение зависимостей в файл.
+"""
+import json
+import random
+
+import pytest
+
+from Storage import JSONStorage
+from Task import TaskStatus
+from TodoManager import TodoManager
+
+
+@pytest.fixture
+def manager(tmp_path):
+    """Новый экземпляр Singleton-менеджера с файлом во временном каталоге."""
+    TodoManager._instance = None
+    TodoManager._initialized = False
+    manager = TodoManager()
+    manager.filename = str(tmp_path / 'tasks.json')
+    yield manager
+    TodoManager._instance = None
+    TodoManager._initialized = False
+
+
+def add_tasks(manager, count):
+    return [manager.add_task(f"Задача {i}", "").id for i in range(count)]
+
+
+def ready_ids(manager):
+    return {task.id for task in manager.get_ready_tasks()}
+
+
+def assert_topological(manager):
+    position = {task.id: i for i, task in enumerate(manager.get_topological_order())}
+    for blocker_id, task_id in manager.get_dependencies():
+        assert position[blocker_id] < position[task_id]
+
+
+def test_cycles_are_rejected(manager):
+    a, b, c = add_tasks(manager, 3)
+
+    assert not manager.add_dependency(a, a)
+    assert manager.add_dependency(a, b)
+    assert manager.add_dependency(b, c)
+    assert not manager.add_dependency(c, a)
+    assert not manager.add_dependency(b, a)
+    assert not manager.add_dependency(a, 999)
+    assert sorted(manager.get_dependencies()) == [(a, b), (b, c)]
+
+
+def test_back_edges_keep_topological_order(manager):
+    a, b, c, d, e = add_tasks(manager, 5)
+
+    # Каждое ребро идёт против порядка создания задач
+    assert manager.add_dependency(e, d)
+    assert manager.add_dependency(d, b)
+    assert manager.add_dependency(c, a)
+    assert manager.add_dependency(b, a)
+    assert manager.add_dependency(e, c)
+
+    assert_topological(manager)
+    assert manager.get_topological_order()[0].id == e
+
+
+def test_random_graph_matches_reachability(manager):
+    rng = random.Random(7)
+    ids = add_tasks(manager, 25)
+    edges = set()
+
+    def reachable(source, target):
+        stack, seen = [source], {source}
+        while stack:
+            node = stack.pop()
+            if node == target:
+                return True
+            for blocker, dependent in edges:
+                if blocker == node and dependent not in seen:
+                    seen.add(dependent)
+                    stack.append(dependent)
+        return False
+
+    for _ in range(150):
+        blocker_id, task_id = rng.sample(ids, 2)
+        expected = (blocker_id, task_id) in edges or not reachable(task_id, blocker_id)
+        assert manager.add_dependency(blocker_id, task_id) == expected
+        if expected:
+            edges.add((blocker_id, task_id))
+        assert_topological(manager)
+
+
+def test_ready_set_follows_status_changes(manager):
+    a, b, c = add_tasks(manager, 3)
+    manager.add_dependency(a, c)
+    manager.add_dependency(b, c)
+    assert ready_ids(manager) == {a, b}
+
+    manager.update_task_status(a, TaskStatus.COMPLETED)
+    assert ready_ids(manager) == {b}
+    manager.update_task_status(b, TaskStatus.IN_PROGRESS)
+    assert ready_ids(manager) == {b}
+    manager.update_task_status(b, TaskStatus.COMPLETED)
+    assert ready_ids(manager) == {c}
+
+    # Повторное открытие блокирующей задачи снова блокирует зависимую
+    manager.update_task_status(a, TaskStatus.PENDING)
+    assert ready_ids(manager) == {a}
+    manager.update_task_status(c, TaskStatus.COMPLETED)
+    manager.update_task_status(a, TaskStatus.COMPLETED)
+    assert ready_ids(manager) == set()
+
+
+def test_ready_set_after_delete_and_removed_dependency(manager):
+    a, b, c = add_tasks(manager, 3)
+    manager.add_dependency(a, b)
+    manager.add_dependency(b, c)
+    assert ready_ids(manager) == {a}
+
+    assert manager.delete_task(a)
+    assert ready_ids(manager) == {b}
+    assert manager.get_dependencies() == [(b, c)]
+
+    assert manager.remove_dependency(b, c)
+    assert not manager.remove_dependency(b, c)
+    assert ready_ids(manager) == {b, c}
+
+    # Ребро от завершённой задачи не блокирует
+    manager.update_task_status(b, TaskStatus.COMPLETED)
+    manager.add_dependency(b, c)
+    assert ready_ids(manager) == {c}
+
+
+def test_save_and_load_object_format(manager):
+    a, b, c = add_tasks(manager, 3)
+    manager.add_dependency(c, b)
+    manager.add_dependency(b, a)
+    manager.update_task_status(c, TaskStatus.COMPLETED)
+    assert manager.save_to_file()
+
+    with open(manager.filename, encoding='utf-8') as file:
+        assert sorted(map(tuple, json.load(file)['dependencies'])) == [(b, a), (c, b)]
+
+    manager.tasks = []
+    manager._reset_graph()
+    assert manager.load_from_file()
+
+    assert sorted(manager.get_dependencies()) == [(b, a), (c, b)]
+    assert [task.id for task in manager.get_topological_order()] == [c, b, a]
+    assert ready_ids(manager) == {b}
+    assert manager.add_task("Новая", "").id == c + 1
+
+
+def test_load_list_format_without_dependencies(manager):
+    a, b = add_tasks(manager, 2)
+    manager.update_task_status(a, TaskStatus.COMPLETED)
+    assert JSONStorage().save(manager.get_all_tasks(), manager.filename)
+
+    with open(manager.filename, encoding='utf-8') as file:
+        assert isinstance(json.load(file), list)
+
+    manager.tasks = []
+    manager._reset_graph()
+    assert manager.load_from_file()
+
+    assert [task.id for task in manager.get_all_tasks()] == [a, b]
+    assert manager.get_dependencies() == []
+    assert ready_ids(manager) == {b}
+    assert manager.add_dependency(b, a)
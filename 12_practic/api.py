@@ -1,24 +1,251 @@
-import requests
-from typing import Dict, Any
+import json
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, Any, Optional
 
-API_URL = 'https://www.cbr-xml-daily.ru/daily_json.js'
+# requests импортируется лениво при первом сетевом запросе: при запуске
+# из локальной БД сеть не нужна, а импорт requests заметно замедляет старт
+if TYPE_CHECKING:
+    import requests
 
+CBR_API_URL = 'https://www.cbr-xml-daily.ru/daily_json.js'
 
-def fetch_rates() -> Dict[str, Any]:
+# Адрес можно переопределить переменной окружения RATES_API_URL,
+# например, чтобы получать курсы через локальный прокси rates_proxy.py
+API_URL = os.environ.get('RATES_API_URL', CBR_API_URL)
+REQUEST_TIMEOUT = 10
+
+# Дисковый кэш ответа API. Ответ моложе CACHE_TTL секунд (или max-age из
+# Cache-Control) отдаётся без запроса; устаревший не более чем на STALE_TTL
+# отдаётся сразу, а в фоне выполняется условный запрос для его обновления
+CACHE_FILE = 'rates_cache.json'
+CACHE_TTL = 3600
+STALE_TTL = 24 * 3600
+
+_session: Optional['requests.Session'] = None
+_cache_entry: Optional[Dict[str, Any]] = None
+_lock = threading.Lock()
+_revalidating = False
+
+
+def get_session() -> 'requests.Session':
+    """
+    Возвращает общую HTTP-сессию с пулом соединений
+
+    Returns:
+        requests.Session: сессия, переиспользующая TCP/TLS-соединения
+    """
+    global _session
+
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    with _lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _session = session
+        return _session
+
+
+def clear_cache():
+    """
+    Очищает кэш ответа API в памяти и на диске
+    """
+    global _cache_entry
+
+    with _lock:
+        _cache_entry = None
+        try:
+            os.remove(CACHE_FILE)
+        except OSError:
+            pass
+
+
+def _load_cache(url: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Загружает запись кэша для адреса API
+
+    Args:
+        url: адрес API (по умолчанию - API_URL)
+
+    Returns:
+        dict: запись кэша или None, если кэша нет
+    """
+    global _cache_entry
+
+    url = url or API_URL
+    with _lock:
+        if _cache_entry is not None and _cache_entry.get('url') == url:
+            return _cache_entry
+
+        try:
+            with open(CACHE_FILE, 'r', encoding='utf-8') as file:
+                entry = json.load(file)
+        except (OSError, ValueError):
+            return None
+
+        if entry.get('url') != url:
+            return None
+        _cache_entry = entry
+        return entry
+
+
+def _store_cache(entry: Dict[str, Any]):
+    """
+    Сохраняет запись кэша в памяти и атомарно записывает её на диск
+
+    Args:
+        entry: запись кэша
+    """
+    global _cache_entry
+
+    with _lock:
+        _cache_entry = entry
+        try:
+            tmp_name = f"{CACHE_FILE}.tmp"
+            with open(tmp_name, 'w', encoding='utf-8') as file:
+                json.dump(entry, file, ensure_ascii=False)
+            os.replace(tmp_name, CACHE_FILE)
+        except OSError:
+            pass
+
+
+def _max_age(response: 'requests.Response') -> int:
+    """
+    Определяет срок свежести ответа по заголовку Cache-Control
+
+    Args:
+        response: HTTP-ответ
+
+    Returns:
+        int: срок свежести в секундах
+    """
+    for directive in response.headers.get('Cache-Control', '').split(','):
+        name, _, value = directive.strip().partition('=')
+        if name.lower() == 'max-age' and value.isdigit():
+            return int(value)
+    return CACHE_TTL
+
+
+def _request(entry: Optional[Dict[str, Any]], url: str) -> Dict[str, Any]:
+    """
+    Выполняет (условный) запрос к API и обновляет кэш
+
+    Args:
+        entry: текущая запись кэша (опционально)
+        url: адрес API
+
+    Returns:
+        dict: новая запись кэша
+    """
+    headers = {}
+    if entry:
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+
+    response = get_session().get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+
+    if response.status_code == 304 and entry:
+        entry = dict(entry,
+                     etag=response.headers.get('ETag', entry.get('etag')),
+                     stored_at=time.time(),
+                     max_age=_max_age(response))
+    else:
+        response.raise_for_status()  # Проверяем статус ответа
+        entry = {
+            'url': url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'stored_at': time.time(),
+            'max_age': _max_age(response),
+            'body': response.json()
+        }
+
+    _store_cache(entry)
+    return entry
+
+
+def _revalidate(entry: Dict[str, Any], url: str):
+    """
+    Обновляет устаревшую запись кэша в фоновом потоке
+
+    Args:
+        entry: устаревшая запись кэша
+        url: адрес API
+    """
+    global _revalidating
+
+    import requests
+
+    try:
+        _request(entry, url)
+    except (requests.RequestException, ValueError):
+        pass
+    finally:
+        with _lock:
+            _revalidating = False
+
+
+def _revalidate_in_background(entry: Dict[str, Any], url: str):
+    """
+    Запускает фоновое обновление кэша, если оно ещё не выполняется
+
+    Args:
+        entry: устаревшая запись кэша
+        url: адрес API
+    """
+    global _revalidating
+
+    with _lock:
+        if _revalidating:
+            return
+        _revalidating = True
+    threading.Thread(target=_revalidate, args=(entry, url), daemon=True).start()
+
+
+def fetch_rates(force: bool = False, url: Optional[str] = None) -> Dict[str, Any]:
     """
     Получение данных о курсе валют через API-запрос
 
+    Свежий ответ берётся из кэша без обращения к сети, устаревший
+    отдаётся сразу и обновляется в фоне. При недоступности сети
+    возвращается последний закэшированный ответ.
+
+    Args:
+        force: Проверить актуальность данных на сервере, не доверяя
+               сроку свежести кэша (условный запрос)
+        url: Адрес API (по умолчанию - API_URL)
+
     Returns:
         dict: Словарь с данными о курсах валют
 
     Raises:
         requests.RequestException: Если произошла ошибка при запросе
     """
+    url = url or API_URL
+    entry = _load_cache(url)
+
+    if entry and not force:
+        age = time.time() - entry['stored_at']
+        if age < entry['max_age']:
+            return entry['body']
+        if age < entry['max_age'] + STALE_TTL:
+            _revalidate_in_background(entry, url)
+            return entry['body']
+
+    import requests
+
     try:
-        response = requests.get(API_URL, timeout=10)
-        response.raise_for_status()  # Проверяем статус ответа
-        return response.json()
+        return _request(entry, url)['body']
     except requests.RequestException as e:
+        if entry and not force:
+            return entry['body']
         raise requests.RequestException(f"Ошибка при запросе к API: {e}")
     except ValueError as e:
-        raise ValueError(f"Ошибка при обработке JSON: {e}")
\ No newline at end of file
+        raise ValueError(f"Ошибка при обработке JSON: {e}")
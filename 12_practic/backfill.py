@@ -0,0 +1,200 @@
+"""
+Загрузка истории курсов валют из архива ЦБ РФ за период.
+
+Архивные файлы за каждую дату запрашиваются параллельно в пуле потоков
+с ограничением частоты запросов и повторами при временных ошибках.
+Результаты записываются в историю БД пачками, поэтому прерванную загрузку
+можно продолжить: даты, которые уже есть в БД или попали
+в период, прореженный при сжатии истории, повторно не запрашиваются.
+Для выходных и праздников архив отвечает 404 - такие даты запоминаются
+как дни без публикации.
+
+Запуск:
+    python backfill.py 2024-01-01 2024-12-31 [--workers N] [--rate N] [--retries N]
+"""
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import db
+from api import REQUEST_TIMEOUT, get_session
+
+ARCHIVE_URL = 'https://www.cbr-xml-daily.ru/archive/{year:04d}/{month:02d}/{day:02d}/daily_json.js'
+
+DEFAULT_WORKERS = 8
+DEFAULT_RATE = 10.0
+DEFAULT_RETRIES = 3
+DEFAULT_BATCH_SIZE = 50
+
+# Пауза перед первым повтором, секунд; перед каждым следующим удваивается
+RETRY_BACKOFF = 0.5
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class RateLimiter:
+    """
+    Ограничитель частоты запросов, общий для всех потоков.
+
+    Запросы распределяются равномерно: не чаще rate запросов в секунду.
+    """
+
+    def __init__(self, rate: float):
+        """
+        Инициализация ограничителя.
+
+        Args:
+            rate: Максимум запросов в секунду (0 - без ограничения)
+        """
+        self.interval = 1 / rate if rate > 0 else 0.0
+        self.next_time = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self):
+        """Блокирует поток до момента, когда можно выполнить следующий запрос."""
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_time)
+            self.next_time = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def fetch_archive(day: date, limiter: RateLimiter, retries: int = DEFAULT_RETRIES,
+                  url_template: str = ARCHIVE_URL) -> Optional[Dict[str, Any]]:
+    """
+    Загружает архивный ответ ЦБ РФ за дату.
+
+    Args:
+        day: Дата курса
+        limiter: Ограничитель частоты запросов
+        retries: Количество повторов при временных ошибках
+        url_template: Шаблон адреса архива с полями year, month, day
+
+    Returns:
+        dict: Данные о курсах или None, если за дату курсы не публиковались
+
+    Raises:
+        requests.RequestException: Если запрос не удался после всех повторов
+    """
+    import requests
+
+    url = url_template.format(year=day.year, month=day.month, day=day.day)
+    for attempt in range(retries + 1):
+        limiter.wait()
+        try:
+            response = get_session().get(url, timeout=REQUEST_TIMEOUT)
+            if response.status_code == 404:
+                return None
+            if response.status_code not in RETRY_STATUSES:
+                response.raise_for_status()
+                return response.json()
+            error: Exception = requests.HTTPError(f"{response.status_code} для {url}", response=response)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            error = e
+
+        if attempt == retries:
+            raise requests.RequestException(f"Ошибка при загрузке архива за {day}: {error}")
+        time.sleep(RETRY_BACKOFF * 2 ** attempt)
+
+
+def _load(day: date, limiter: RateLimiter, retries: int,
+          url_template: str) -> Tuple[date, Optional[Dict[str, Any]], Optional[Exception]]:
+    """
+    Загружает архив за дату, не выбрасывая исключений (для пула потоков).
+
+    Returns:
+        tuple: Дата, данные (None - нет публикации) и ошибка (None - успех)
+    """
+    try:
+        return day, fetch_archive(day, limiter, retries, url_template), None
+    except Exception as e:
+        return day, None, e
+
+
+def backfill(start: date, end: date, workers: int = DEFAULT_WORKERS, rate: float = DEFAULT_RATE,
+             retries: int = DEFAULT_RETRIES, batch_size: int = DEFAULT_BATCH_SIZE,
+             url_template: str = ARCHIVE_URL, today: Optional[date] = None) -> Dict[str, int]:
+    """
+    Загружает историю курсов за период и сохраняет её в БД.
+
+    Args:
+        start: Первая дата периода
+        end: Последняя дата периода
+        workers: Количество параллельных запросов
+        rate: Максимум запросов в секунду (0 - без ограничения)
+        retries: Количество повторов при временных ошибках
+        batch_size: Сколько дат загружать перед записью в БД
+        url_template: Шаблон адреса архива с полями year, month, day
+        today: Текущая дата (по умолчанию - сегодня); для неё и более поздних
+               дат отсутствие публикации не запоминается
+
+    Returns:
+        dict: Количество загруженных дат, дней без публикации,
+              ошибок и пропущенных (уже загруженных) дат
+    """
+    today = today or date.today()
+    known = db.get_history_dates(start.isoformat(), end.isoformat())
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    todo = [day for day in days if day.isoformat() not in known]
+
+    stats = {'loaded': 0, 'gaps': 0, 'failed': 0, 'skipped': len(days) - len(todo)}
+    limiter = RateLimiter(rate)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for offset in range(0, len(todo), batch_size):
+            batch = todo[offset:offset + batch_size]
+            results = pool.map(lambda day: _load(day, limiter, retries, url_template), batch)
+
+            payloads: List[Tuple[str, Dict[str, Any]]] = []
+            gaps: List[str] = []
+            for day, data, error in results:
+                if error is not None:
+                    stats['failed'] += 1
+                    continue
+                # Архив за нерабочий день может вернуть курс другой даты
+                rate_date = data.get('Date', '')[:10] if data else None
+                if data and rate_date:
+                    payloads.append((rate_date, data.get('Valute', {})))
+                    stats['loaded'] += 1
+                if rate_date != day.isoformat() and day < today:
+                    gaps.append(day.isoformat())
+                    stats['gaps'] += 1
+
+            db.save_history_bulk(payloads, gaps)
+
+    return stats
+
+
+def main():
+    """
+    Точка входа: разбирает аргументы командной строки и запускает загрузку.
+    """
+    parser = argparse.ArgumentParser(description="Загрузка истории курсов из архива ЦБ РФ")
+    parser.add_argument('start', type=date.fromisoformat, help="первая дата (YYYY-MM-DD)")
+    parser.add_argument('end', type=date.fromisoformat, help="последняя дата (YYYY-MM-DD)")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help="параллельных запросов")
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE, help="запросов в секунду (0 - без ограничения)")
+    parser.add_argument('--retries', type=int, default=DEFAULT_RETRIES, help="повторов при ошибках")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help="дат в одной записи в БД")
+    parser.add_argument('--url', default=ARCHIVE_URL, help="шаблон адреса архива")
+    parser.add_argument('--db', help="путь к БД")
+    args = parser.parse_args()
+
+    if args.db:
+        db.DB_NAME = args.db
+
+    started = time.perf_counter()
+    stats = backfill(args.start, args.end, args.workers, args.rate, args.retries, args.batch_size, args.url)
+    elapsed = time.perf_counter() - started
+
+    print(f"Загружено дат: {stats['loaded']}, без публикации: {stats['gaps']}, "
+          f"ошибок: {stats['failed']}, уже в БД: {stats['skipped']} ({elapsed:.1f} с)")
+
+
+if __name__ == "__main__":
+    main()
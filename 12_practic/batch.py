@@ -0,0 +1,234 @@
+"""
+Пакетный расчёт кредитного портфеля без GUI.
+
+Читает кредиты из CSV (amount, term, rate, currency), рассчитывает ежемесячный
+аннуитетный платёж, сумму выплат и проценты и пишет результат в CSV.
+При --convert результаты дополнительно переводятся в валюту кредита
+по курсам из локальной БД; если курса валюты в БД нет, конвертированные
+столбцы остаются пустыми, а валюта указывается в отчёте.
+
+Файл обрабатывается потоково: строки читаются блоками по --chunk-size и
+считаются в пуле процессов, при этом в работе одновременно находится не больше
+двух блоков на процесс, поэтому расход памяти не зависит от размера файла.
+Блоки передаются процессам как текст, разбор и форматирование CSV выполняются
+в процессах пула. Поэтому значения во входном файле не должны содержать
+переводов строк.
+
+Запуск:
+    python batch.py loans.csv results.csv [--convert] [--workers N] [--chunk-size N]
+"""
+import argparse
+import csv
+import io
+import os
+import sys
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple
+
+import numpy as np
+
+import db
+from converter import BASE_CURRENCY
+from loan import annuity_payment
+
+INPUT_COLUMNS = ['amount', 'term', 'rate', 'currency']
+OUTPUT_COLUMNS = INPUT_COLUMNS + ['monthly_payment', 'total_payment', 'total_interest']
+CONVERTED_COLUMNS = ['monthly_payment_converted', 'total_payment_converted', 'total_interest_converted']
+
+DEFAULT_CHUNK_SIZE = 50_000
+
+# Курсы валют для конвертации; задаются в каждом процессе пула через инициализатор
+_rates: Optional[Dict[str, float]] = None
+
+
+def _init_worker(rates: Optional[Dict[str, float]]):
+    """
+    Инициализатор процесса пула: сохраняет курсы валют
+
+    Args:
+        rates: код валюты -> курс (None, если конвертация не нужна)
+    """
+    global _rates
+    _rates = rates
+
+
+def _parse(value: str) -> float:
+    """
+    Преобразует значение из CSV в число
+
+    Args:
+        value: строковое значение
+
+    Returns:
+        float: число или NaN, если значение некорректно
+    """
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float('nan')
+
+
+def process_chunk(text: str, indexes: List[int]) -> Tuple[str, int, int, Counter]:
+    """
+    Рассчитывает платежи для блока строк CSV одной векторной операцией
+
+    Args:
+        text: блок строк входного CSV
+        indexes: позиции столбцов amount, term, rate, currency во входном файле
+
+    Returns:
+        tuple: блок строк результата, количество рассчитанных и пропущенных строк
+               и количество кредитов по валютам, для которых нет курса
+    """
+    rows = [[row[i] if i < len(row) else '' for i in indexes] for row in csv.reader(io.StringIO(text))]
+
+    amounts = np.array([_parse(row[0]) for row in rows])
+    terms = np.array([_parse(row[1]) for row in rows])
+    rates = np.array([_parse(row[2]) for row in rows])
+    currencies = [row[3].strip().upper() for row in rows]
+
+    valid = (amounts > 0) & (terms > 0) & (terms == np.floor(terms)) & (rates >= 0)
+
+    monthly = np.full(len(rows), np.nan)
+    monthly[valid] = annuity_payment(amounts[valid], terms[valid], rates[valid])
+    total = monthly * terms
+    interest = total - amounts
+
+    unknown: Counter = Counter()
+    if _rates is not None:
+        divisors = np.array([_rates.get(currency, np.nan) for currency in currencies])
+
+    output = io.StringIO()
+    writer = csv.writer(output)
+    selected = np.flatnonzero(valid)
+    for i in selected:
+        row = rows[i]
+        out = [row[0], row[1], row[2], currencies[i],
+               f"{monthly[i]:.2f}", f"{total[i]:.2f}", f"{interest[i]:.2f}"]
+        if _rates is not None:
+            divisor = divisors[i]
+            if np.isnan(divisor):
+                unknown[currencies[i]] += 1
+                out += [''] * len(CONVERTED_COLUMNS)
+            else:
+                out += [f"{monthly[i] / divisor:.2f}", f"{total[i] / divisor:.2f}",
+                        f"{interest[i] / divisor:.2f}"]
+        writer.writerow(out)
+
+    return output.getvalue(), len(selected), len(rows) - len(selected), unknown
+
+
+def read_chunks(input_file: TextIO, chunk_size: int) -> Iterator[str]:
+    """
+    Разбивает поток строк файла на текстовые блоки
+
+    Args:
+        input_file: открытый входной файл
+        chunk_size: количество строк в блоке
+
+    Yields:
+        str: очередной блок строк
+    """
+    while True:
+        lines = list(islice(input_file, chunk_size))
+        if not lines:
+            return
+        yield ''.join(lines)
+
+
+def run(input_file: TextIO, output_file: TextIO, rates: Optional[Dict[str, float]] = None,
+        workers: Optional[int] = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Tuple[int, int, Counter]:
+    """
+    Потоково рассчитывает портфель кредитов из CSV в CSV
+
+    Порядок строк результата совпадает с порядком строк входного файла.
+
+    Args:
+        input_file: открытый входной CSV-файл с заголовком
+        output_file: открытый выходной файл
+        rates: код валюты -> курс для конвертации (опционально);
+               курс базовой валюты (RUB) добавляется автоматически
+        workers: количество процессов (по умолчанию - число ядер)
+        chunk_size: количество строк в одном блоке
+
+    Returns:
+        tuple: количество обработанных и пропущенных строк и количество
+               кредитов по валютам без курса (конвертация для них не выполнена)
+    """
+    unknown: Counter = Counter()
+    header = next(csv.reader([input_file.readline()]), None)
+    if not header:
+        return 0, 0, unknown
+
+    # Поддерживаем произвольный порядок столбцов во входном файле
+    positions = {name.strip().lower(): i for i, name in enumerate(header)}
+    missing = [name for name in INPUT_COLUMNS if name not in positions]
+    if missing:
+        raise ValueError(f"Во входном файле нет столбцов: {', '.join(missing)}")
+    indexes = [positions[name] for name in INPUT_COLUMNS]
+
+    if rates is not None:
+        rates = {BASE_CURRENCY: 1.0, **rates}
+    csv.writer(output_file).writerow(OUTPUT_COLUMNS + (CONVERTED_COLUMNS if rates is not None else []))
+
+    workers = workers or os.cpu_count() or 1
+    processed = skipped = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(rates,)) as pool:
+        pending = deque()
+        for chunk in read_chunks(input_file, chunk_size):
+            pending.append(pool.submit(process_chunk, chunk, indexes))
+            while len(pending) >= workers * 2 or (pending and pending[0].done()):
+                text, done, bad, no_rate = pending.popleft().result()
+                output_file.write(text)
+                processed += done
+                skipped += bad
+                unknown.update(no_rate)
+        while pending:
+            text, done, bad, no_rate = pending.popleft().result()
+            output_file.write(text)
+            processed += done
+            skipped += bad
+            unknown.update(no_rate)
+
+    return processed, skipped, unknown
+
+
+def main():
+    """
+    Точка входа: разбирает аргументы командной строки и запускает расчёт.
+    """
+    parser = argparse.ArgumentParser(description="Пакетный расчёт кредитного портфеля")
+    parser.add_argument('input', help="входной CSV (amount, term, rate, currency) или '-' для stdin")
+    parser.add_argument('output', help="выходной CSV или '-' для stdout")
+    parser.add_argument('--convert', action='store_true', help="конвертировать результаты по курсам из БД")
+    parser.add_argument('--db', help="путь к БД с курсами валют")
+    parser.add_argument('--workers', type=int, default=None, help="количество процессов")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="строк в одном блоке")
+    args = parser.parse_args()
+
+    rates = None
+    if args.convert:
+        if args.db:
+            db.DB_NAME = args.db
+        rates = db.get_saved_rates()
+
+    input_file = sys.stdin if args.input == '-' else open(args.input, 'r', encoding='utf-8', newline='')
+    output_file = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8', newline='')
+    try:
+        processed, skipped, unknown = run(input_file, output_file, rates, args.workers, args.chunk_size)
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+        if output_file is not sys.stdout:
+            output_file.close()
+
+    print(f"Обработано кредитов: {processed}, пропущено некорректных строк: {skipped}", file=sys.stderr)
+    if unknown:
+        details = ', '.join(f"{currency or '(пусто)'}: {count}" for currency, count in sorted(unknown.items()))
+        print(f"Нет курса в БД, конвертация не выполнена ({details})", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+"""
+Замеры производительности приложения без запуска GUI.
+
+Сценарии:
+- расчёт аннуитетного платежа (по одному и пакетом);
+- save_rate / get_saved_rate при разном размере таблицы курсов
+  (с промахом и попаданием в кэш курсов);
+- обновление курсов как в update_db (построчно и одной транзакцией);
+- fetch_rates против локального тестового сервера
+  (первый запрос, условный запрос с ответом 304, попадание в кэш).
+
+Для каждого сценария считаются перцентили задержки и пропускная способность;
+результаты печатаются и сохраняются в JSON.
+
+Запуск:
+    python benchmark.py [--currencies N] [--repeat N] [--sizes 10 1000 100000] [--output FILE]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import tempfile
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+import api
+import db
+from loan import annuity_payment
+
+DEFAULT_SIZES = [10, 1000, 100000]
+DEFAULT_OUTPUT = 'benchmark_results.json'
+ANNUITY_BATCH = 10000
+PERCENTILES = (50, 90, 99)
+
+
+def make_valute(count: int) -> Dict[str, Dict[str, Any]]:
+    """
+    Создаёт синтетический словарь 'Valute' в формате ответа ЦБ РФ
+
+    Args:
+        count: количество валют
+
+    Returns:
+        dict: код валюты -> данные о валюте
+    """
+    return {
+        f"C{i:06d}": {'CharCode': f"C{i:06d}", 'Nominal': 1, 'Value': 50.0 + i / 100}
+        for i in range(count)
+    }
+
+
+def refresh_per_row(valute: Dict[str, Dict[str, Any]]):
+    """
+    Обновление курсов по одной валюте (прежний путь update_db)
+
+    Args:
+        valute: словарь 'Valute' из ответа API
+    """
+    for code, info in valute.items():
+        rate = info.get('Value')
+        if rate:
+            db.save_rate(code, rate, info.get('Nominal', 1))
+
+
+def refresh_bulk(valute: Dict[str, Dict[str, Any]]):
+    """
+    Обновление курсов одной транзакцией вместе с записью в историю
+
+    Args:
+        valute: словарь 'Valute' из ответа API
+    """
+    db.save_rates_bulk(valute, datetime.now().isoformat())
+
+
+def measure(func: Callable[[], Any], repeat: int, setup: Optional[Callable[[], Any]] = None,
+            items: int = 1) -> Dict[str, float]:
+    """
+    Замеряет задержку каждого вызова функции
+
+    Args:
+        func: замеряемая функция без аргументов
+        repeat: количество вызовов
+        setup: функция, вызываемая перед каждым замером вне замера (опционально)
+        items: сколько элементов обрабатывает один вызов (для пропускной способности)
+
+    Returns:
+        dict: перцентили и максимум задержки в мс, вызовов и элементов в секунду
+    """
+    latencies: List[float] = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - start)
+
+    values = np.array(latencies) * 1000
+    total = float(np.sum(values)) / 1000
+    result = {f"p{p}_ms": float(np.percentile(values, p)) for p in PERCENTILES}
+    result.update({
+        'mean_ms': float(np.mean(values)),
+        'max_ms': float(np.max(values)),
+        'calls': repeat,
+        'ops_per_sec': repeat / total if total else float('inf'),
+        'items_per_sec': repeat * items / total if total else float('inf'),
+    })
+    return result
+
+
+def bench_annuity(repeat: int) -> Dict[str, Dict[str, float]]:
+    """
+    Замеры расчёта аннуитетного платежа
+
+    Args:
+        repeat: количество вызовов
+
+    Returns:
+        dict: название сценария -> результаты замера
+    """
+    rng = np.random.default_rng(0)
+    amounts = rng.uniform(1e5, 1e7, ANNUITY_BATCH)
+    months = rng.integers(6, 361, ANNUITY_BATCH)
+    rates = rng.uniform(0, 25, ANNUITY_BATCH)
+
+    return {
+        'annuity_scalar': measure(lambda: annuity_payment(1_000_000, 120, 12.5), repeat * 10),
+        f'annuity_batch_{ANNUITY_BATCH}': measure(lambda: annuity_payment(amounts, months, rates),
+                                                  repeat, items=ANNUITY_BATCH),
+    }
+
+
+def bench_rates_table(sizes: List[int], repeat: int) -> Dict[str, Dict[str, float]]:
+    """
+    Замеры save_rate и get_saved_rate при разном размере таблицы курсов
+
+    Args:
+        sizes: размеры таблицы (количество валют)
+        repeat: количество вызовов
+
+    Returns:
+        dict: название сценария -> результаты замера
+    """
+    results = {}
+    rng = random.Random(0)
+    for size in sizes:
+        db.save_rates_bulk(make_valute(size))
+        codes = [f"C{rng.randrange(size):06d}" for _ in range(repeat)]
+        calls = iter(codes * 3)
+
+        results[f'save_rate_{size}'] = measure(lambda: db.save_rate(next(calls), 42.0), repeat)
+        results[f'get_saved_rate_miss_{size}'] = measure(lambda: db.get_saved_rate(next(calls)),
+                                                         repeat, setup=db.clear_rate_cache)
+        for code in codes:
+            db.get_saved_rate(code)
+        results[f'get_saved_rate_hit_{size}'] = measure(lambda: db.get_saved_rate(next(calls)), repeat)
+
+        # Следующий размер замеряется на таблице без лишних строк
+        with db.get_connection() as conn:
+            conn.execute("DELETE FROM rates")
+        db.clear_rate_cache()
+    return results
+
+
+def bench_refresh(currencies: int, repeat: int) -> Dict[str, Dict[str, float]]:
+    """
+    Замеры обновления курсов как в update_db
+
+    Args:
+        currencies: количество валют в ответе API
+        repeat: количество вызовов
+
+    Returns:
+        dict: название сценария -> результаты замера
+    """
+    valute = make_valute(currencies)
+    return {
+        f'refresh_per_row_{currencies}': measure(lambda: refresh_per_row(valute), repeat, items=currencies),
+        f'refresh_bulk_{currencies}': measure(lambda: refresh_bulk(valute), repeat, items=currencies),
+    }
+
+
+def make_stub_handler(body: bytes, etag: str):
+    """
+    Создаёт обработчик тестового сервера, отдающего фиксированный ответ ЦБ РФ
+
+    Args:
+        body: тело ответа (JSON)
+        etag: ETag ответа
+
+    Returns:
+        type: класс обработчика для ThreadingHTTPServer
+    """
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'max-age=3600')
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubHandler
+
+
+def bench_fetch(currencies: int, repeat: int, tmp_dir: str) -> Dict[str, Dict[str, float]]:
+    """
+    Замеры fetch_rates против локального тестового сервера
+
+    Args:
+        currencies: количество валют в ответе
+        repeat: количество вызовов
+        tmp_dir: каталог для файла кэша ответа
+
+    Returns:
+        dict: название сценария -> результаты замера
+    """
+    payload = {'Date': datetime.now().isoformat(), 'Valute': make_valute(currencies)}
+    body = json.dumps(payload).encode('utf-8')
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_stub_handler(body, '"benchmark"'))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    url = f"http://127.0.0.1:{server.server_address[1]}/daily_json.js"
+    api.CACHE_FILE = os.path.join(tmp_dir, 'rates_cache.json')
+    try:
+        return {
+            f'fetch_rates_cold_{currencies}': measure(lambda: api.fetch_rates(url=url), repeat,
+                                                      setup=api.clear_cache),
+            f'fetch_rates_304_{currencies}': measure(lambda: api.fetch_rates(force=True, url=url), repeat),
+            f'fetch_rates_cached_{currencies}': measure(lambda: api.fetch_rates(url=url), repeat * 10),
+        }
+    finally:
+        server.shutdown()
+        server.server_close()
+        api.clear_cache()
+
+
+def print_results(results: Dict[str, Dict[str, float]]):
+    """
+    Печатает таблицу результатов
+
+    Args:
+        results: название сценария -> результаты замера
+    """
+    print(f"{'Сценарий':<32} {'p50, мс':>10} {'p90, мс':>10} {'p99, мс':>10} {'max, мс':>10} {'оп/с':>12}")
+    for name, stats in results.items():
+        print(f"{name:<32} {stats['p50_ms']:>10.3f} {stats['p90_ms']:>10.3f} {stats['p99_ms']:>10.3f} "
+              f"{stats['max_ms']:>10.3f} {stats['ops_per_sec']:>12,.0f}")
+
+
+def main():
+    """
+    Точка входа: выполняет все сценарии и сохраняет результаты в JSON.
+    """
+    parser = argparse.ArgumentParser(description="Замеры производительности приложения")
+    parser.add_argument('--currencies', type=int, default=43, help="количество валют в ответе")
+    parser.add_argument('--repeat', type=int, default=200, help="количество вызовов в сценарии")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help="размеры таблицы курсов для замеров БД")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="файл для результатов (JSON)")
+    args = parser.parse_args()
+
+    results: Dict[str, Dict[str, float]] = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db.DB_NAME = os.path.join(tmp_dir, 'benchmark.db')
+        db.init_db()
+        try:
+            results.update(bench_annuity(args.repeat))
+            results.update(bench_rates_table(args.sizes, args.repeat))
+            results.update(bench_refresh(args.currencies, args.repeat))
+            results.update(bench_fetch(args.currencies, args.repeat, tmp_dir))
+        finally:
+            db.close_connection()
+
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'params': vars(args),
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print_results(results)
+    print(f"Результаты сохранены в {args.output}")
+
+
+if __name__ == "__main__":
+    main()
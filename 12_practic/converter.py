@@ -0,0 +1,127 @@
+"""
+Конвертация сумм сразу во все валюты.
+
+Курсы и номиналы загружаются из БД один раз после каждого обновления
+и хранятся в массивах NumPy вместе с полной матрицей кросс-курсов, поэтому
+конвертация в любую валюту или во все валюты сразу не обращается к БД.
+"""
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+import db
+
+BASE_CURRENCY = 'RUB'
+
+
+class ConversionTable:
+    """
+    Таблица кросс-курсов для всех валют из БД.
+
+    matrix[i, j] - сколько единиц валюты j стоит одна единица валюты i.
+    Курсы ЦБ РФ делятся на номинал (например, JPY котируется за 100 единиц).
+    """
+
+    def __init__(self, rate_table: Optional[List[Tuple[str, float, int]]] = None):
+        """
+        Инициализация таблицы.
+
+        Args:
+            rate_table: Тройки (код валюты, курс за nominal единиц, nominal);
+                        если не переданы - читаются из БД
+        """
+        if rate_table is None:
+            rate_table = db.get_rate_table()
+
+        codes = [BASE_CURRENCY] + [code for code, _, _ in rate_table if code != BASE_CURRENCY]
+        values = np.array([1.0] + [rate for code, rate, _ in rate_table if code != BASE_CURRENCY])
+        nominals = np.array([1.0] + [nominal for code, _, nominal in rate_table if code != BASE_CURRENCY])
+
+        self.codes: List[str] = codes
+        self.index: Dict[str, int] = {code: i for i, code in enumerate(codes)}
+        # Стоимость одной единицы каждой валюты в рублях
+        self.rub_per_unit: np.ndarray = values / nominals
+        self.matrix: np.ndarray = self.rub_per_unit[:, None] / self.rub_per_unit[None, :]
+
+    @classmethod
+    def from_valute(cls, valute: Dict[str, Dict]) -> 'ConversionTable':
+        """
+        Создаёт таблицу из словаря 'Valute' ответа API ЦБ РФ.
+
+        Args:
+            valute: Код валюты -> данные о валюте
+
+        Returns:
+            ConversionTable: Таблица кросс-курсов
+        """
+        return cls(sorted((code, info['Value'], info.get('Nominal', 1))
+                          for code, info in valute.items() if info.get('Value')))
+
+    def __contains__(self, currency: str) -> bool:
+        return currency in self.index
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def _row(self, currency: str) -> np.ndarray:
+        """
+        Строка матрицы кросс-курсов для исходной валюты.
+
+        Args:
+            currency: Код исходной валюты
+
+        Returns:
+            np.ndarray: Курсы исходной валюты ко всем валютам
+
+        Raises:
+            ValueError: Если валюты нет в таблице
+        """
+        try:
+            return self.matrix[self.index[currency]]
+        except KeyError:
+            raise ValueError(f"Курс для валюты {currency} не найден в базе данных")
+
+    def convert(self, amount: float, target: str, source: str = BASE_CURRENCY) -> float:
+        """
+        Конвертирует сумму из одной валюты в другую.
+
+        Args:
+            amount: Сумма в исходной валюте
+            target: Код целевой валюты
+            source: Код исходной валюты (по умолчанию RUB)
+
+        Returns:
+            float: Сумма в целевой валюте
+
+        Raises:
+            ValueError: Если одной из валют нет в таблице
+        """
+        if target not in self.index:
+            raise ValueError(f"Курс для валюты {target} не найден в базе данных")
+        return float(amount * self._row(source)[self.index[target]])
+
+    def convert_all(self, amount: float, source: str = BASE_CURRENCY) -> Dict[str, float]:
+        """
+        Конвертирует сумму во все валюты одной векторной операцией.
+
+        Args:
+            amount: Сумма в исходной валюте
+            source: Код исходной валюты (по умолчанию RUB)
+
+        Returns:
+            dict: Код валюты -> сумма в этой валюте
+        """
+        return dict(zip(self.codes, (amount * self._row(source)).tolist()))
+
+    def convert_array(self, amounts, source: str = BASE_CURRENCY) -> np.ndarray:
+        """
+        Конвертирует массив сумм (например, график платежей) во все валюты.
+
+        Args:
+            amounts: Массив сумм в исходной валюте
+            source: Код исходной валюты (по умолчанию RUB)
+
+        Returns:
+            np.ndarray: Массив формы (валюты, *форма amounts); порядок валют совпадает с codes
+        """
+        return np.multiply.outer(self._row(source), np.asarray(amounts, dtype=float))
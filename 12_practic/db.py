@@ -1,79 +1,530 @@
+import atexit
 import sqlite3
-from datetime import datetime
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 
 DB_NAME = 'exchange_rates.db'
+BUSY_TIMEOUT = 5.0
 
+# Хранение истории: дневные курсы за последние HISTORY_DAILY_DAYS дней,
+# для более старых периодов - один курс на месяц; записи старше
+# HISTORY_RETENTION_DAYS удаляются. None - не прореживать и не удалять:
+# по умолчанию история, загруженная backfill.py, хранится целиком
+HISTORY_DAILY_DAYS: Optional[int] = None
+HISTORY_RETENTION_DAYS: Optional[int] = None
 
-def init_db():
+# SQL-запросы вынесены в константы: sqlite3 кэширует подготовленные
+# выражения по тексту запроса, поэтому повторные вызовы не парсят SQL заново
+# Курсы ЦБ РФ указываются за nominal единиц валюты (например, JPY - за 100),
+# поэтому функции чтения возвращают курс за одну единицу: rate / nominal
+SAVE_RATE_SQL = """
+    INSERT INTO rates (currency, rate, nominal, fetched_at)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(currency) DO UPDATE SET
+        rate = excluded.rate,
+        nominal = excluded.nominal,
+        fetched_at = excluded.fetched_at
+"""
+
+GET_RATE_SQL = """
+    SELECT rate / nominal FROM rates
+    WHERE currency = ?
+"""
+
+SAVE_HISTORY_SQL = """
+    INSERT INTO rate_history (currency, rate_date, rate, nominal)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(currency, rate_date) DO UPDATE SET
+        rate = excluded.rate,
+        nominal = excluded.nominal
+"""
+
+_connection: Optional[sqlite3.Connection] = None
+_connection_path: Optional[str] = None
+_lock = threading.RLock()
+_rate_cache: Dict[str, float] = {}
+
+
+def get_connection() -> sqlite3.Connection:
+    """
+    Возвращает общее соединение с БД, открывая его при первом обращении
+
+    Соединение работает в режиме WAL с таймаутом ожидания блокировки,
+    поэтому чтение не блокируется записью из другого процесса.
+    При открытии соединения создаётся схема БД.
+    При смене DB_NAME соединение переоткрывается.
+
+    Returns:
+        sqlite3.Connection: соединение с БД
+    """
+    global _connection, _connection_path
+
+    with _lock:
+        if _connection is None or _connection_path != DB_NAME:
+            close_connection()
+            conn = sqlite3.connect(DB_NAME, timeout=BUSY_TIMEOUT, check_same_thread=False)
+            conn.execute(f"PRAGMA busy_timeout = {int(BUSY_TIMEOUT * 1000)}")
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            _create_schema(conn)
+            _connection = conn
+            _connection_path = DB_NAME
+        return _connection
+
+
+def close_connection():
+    """
+    Закрывает общее соединение с БД и очищает кэш курсов
+    """
+    global _connection, _connection_path
+
+    with _lock:
+        if _connection is not None:
+            _connection.close()
+        _connection = None
+        _connection_path = None
+        clear_rate_cache()
+
+
+def clear_rate_cache():
     """
-    Инициализация БД. Создаёт таблицу со столбцами:
-    id, имя валюты, курс, дата обновления
+    Очищает кэш курсов в памяти
     """
-    with sqlite3.connect(DB_NAME) as conn:
-        cur = conn.cursor()
+    with _lock:
+        _rate_cache.clear()
 
-        cur.execute("""
+
+def _create_schema(conn: sqlite3.Connection):
+    """
+    Создаёт таблицу текущих курсов со столбцами:
+    id, имя валюты, курс, номинал, дата обновления,
+    и таблицу истории курсов с ключом (валюта, дата курса)
+
+    Args:
+        conn: соединение с БД
+    """
+    with conn:
+        conn.execute("""
             CREATE TABLE IF NOT EXISTS rates (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 currency TEXT UNIQUE NOT NULL,
                 rate REAL NOT NULL,
+                nominal INTEGER NOT NULL DEFAULT 1,
                 fetched_at TEXT NOT NULL
             )
         """)
+        # Добавляем столбец номинала в БД, созданные до его появления
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(rates)")]
+        migrate_nominal = 'nominal' not in columns
+        if migrate_nominal:
+            conn.execute("ALTER TABLE rates ADD COLUMN nominal INTEGER NOT NULL DEFAULT 1")
+        # WITHOUT ROWID: строки хранятся прямо в B-дереве первичного ключа,
+        # поэтому поиск по (валюта, дата) не требует обращения к таблице
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS rate_history (
+                currency TEXT NOT NULL,
+                rate_date TEXT NOT NULL,
+                rate REAL NOT NULL,
+                nominal INTEGER NOT NULL DEFAULT 1,
+                PRIMARY KEY (currency, rate_date)
+            ) WITHOUT ROWID
+        """)
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_rate_history_date
+            ON rate_history (rate_date, currency, rate, nominal)
+        """)
+        # Даты, за которые ЦБ РФ не публиковал курсы (выходные и праздники)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS rate_history_gaps (
+                rate_date TEXT PRIMARY KEY
+            ) WITHOUT ROWID
+        """)
+        # Даты, прореженные compact_history: их курсы удалены намеренно
+        # и не должны загружаться заново. Таблица прежнего формата хранила
+        # диапазоны, захватывавшие незагруженные даты, поэтому удаляется
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(rate_history_compacted)")]
+        if 'start_date' in columns:
+            conn.execute("DROP TABLE rate_history_compacted")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS rate_history_compacted (
+                rate_date TEXT PRIMARY KEY
+            ) WITHOUT ROWID
+        """)
+        if migrate_nominal:
+            _migrate_nominal(conn)
+
+
+def _migrate_nominal(conn: sqlite3.Connection):
+    """
+    Восстанавливает номиналы курсов, сохранённых до появления столбца nominal
+
+    Такие курсы записаны за Nominal единиц валюты (например, JPY - за 100),
+    а после добавления столбца получают номинал 1. Номинал берётся из
+    последней записи истории валюты; курсы, для которых истории нет,
+    удаляются - они будут загружены заново при следующем запуске.
+
+    Args:
+        conn: соединение с БД (внутри открытой транзакции)
+    """
+    conn.execute("""
+        UPDATE rates SET nominal = (
+            SELECT nominal FROM rate_history h
+            WHERE h.currency = rates.currency
+            ORDER BY rate_date DESC
+            LIMIT 1
+        )
+        WHERE currency IN (SELECT currency FROM rate_history)
+    """)
+    conn.execute("DELETE FROM rates WHERE currency NOT IN (SELECT currency FROM rate_history)")
 
 
-def save_rate(target_currency: str, rate: float):
+def init_db():
+    """
+    Инициализация БД
+
+    Схема создаётся один раз при открытии соединения, поэтому повторные
+    вызовы ничего не делают. Явный вызов нужен только чтобы открыть БД заранее.
+    """
+    get_connection()
+
+
+def save_rate(target_currency: str, rate: float, nominal: int = 1):
     """
     Сохранение данных о курсе валют в БД
 
     Args:
         target_currency: код валюты (например, 'USD', 'EUR')
-        rate: курс валюты
+        rate: курс валюты за nominal единиц
+        nominal: количество единиц валюты, за которое указан курс
+    """
+    fetched_at = datetime.now().isoformat()
+
+    with _lock:
+        conn = get_connection()
+        with conn:
+            conn.execute(SAVE_RATE_SQL, (target_currency, rate, nominal, fetched_at))
+        _rate_cache.pop(target_currency, None)
+
+
+def _history_rows(rate_date: str, valute: Dict[str, Dict[str, Any]]) -> List[Tuple[str, str, float, int]]:
+    """
+    Строки таблицы истории для одного ответа ЦБ РФ
+
+    Args:
+        rate_date: дата курса (используются первые 10 символов - 'YYYY-MM-DD')
+        valute: словарь 'Valute' из ответа API
+
+    Returns:
+        list: строки (валюта, дата курса, курс, номинал)
+    """
+    return [(code, rate_date[:10], info['Value'], info.get('Nominal', 1))
+            for code, info in valute.items() if info.get('Value')]
+
+
+def save_rates_bulk(valute: Dict[str, Dict[str, Any]], rate_date: Optional[str] = None) -> int:
+    """
+    Сохранение курсов всех валют из ответа ЦБ РФ одной транзакцией
+
+    Все курсы записываются через executemany с общей датой обновления,
+    поэтому читатели видят либо старый, либо полностью новый набор курсов.
+    Если указана дата курса, в той же транзакции пополняется история.
+
+    Args:
+        valute: словарь 'Valute' из ответа API (код валюты -> данные о валюте)
+        rate_date: дата курса в формате 'YYYY-MM-DD' (опционально)
+
+    Returns:
+        int: количество сохранённых курсов
+    """
+    fetched_at = datetime.now().isoformat()
+    rows = [(code, info['Value'], info.get('Nominal', 1), fetched_at)
+            for code, info in valute.items() if info.get('Value')]
+
+    with _lock:
+        conn = get_connection()
+        with conn:
+            conn.executemany(SAVE_RATE_SQL, rows)
+            if rate_date:
+                conn.executemany(SAVE_HISTORY_SQL, _history_rows(rate_date, valute))
+        for code, *_ in rows:
+            _rate_cache.pop(code, None)
+
+    return len(rows)
+
+
+def save_history_bulk(payloads: Iterable[Tuple[str, Dict[str, Any]]], gaps: Iterable[str] = ()) -> int:
+    """
+    Сохранение архивных курсов в историю одной транзакцией
+
+    Таблица текущих курсов не изменяется.
+
+    Args:
+        payloads: пары (дата курса, словарь 'Valute' из ответа API)
+        gaps: даты без публикации курсов в формате 'YYYY-MM-DD'
+
+    Returns:
+        int: количество сохранённых записей истории
+    """
+    rows = [row for rate_date, valute in payloads for row in _history_rows(rate_date, valute)]
+
+    with _lock:
+        conn = get_connection()
+        with conn:
+            conn.executemany(SAVE_HISTORY_SQL, rows)
+            conn.executemany("INSERT OR IGNORE INTO rate_history_gaps (rate_date) VALUES (?)",
+                             [(gap,) for gap in gaps])
+
+    return len(rows)
+
+
+def get_history_dates(start_date: str, end_date: str) -> Set[str]:
     """
-    with sqlite3.connect(DB_NAME) as conn:
-        cur = conn.cursor()
+    Получение дат периода, для которых история уже загружена
 
-        fetched_at = datetime.now().isoformat()
+    Учитываются даты с курсами, даты, за которые курсы не публиковались,
+    и даты, курсы за которые удалены при прореживании (compact_history).
+
+    Args:
+        start_date: начало периода в формате 'YYYY-MM-DD'
+        end_date: конец периода в формате 'YYYY-MM-DD'
 
-        cur.execute("""
-            INSERT INTO rates (currency, rate, fetched_at)
-            VALUES (?, ?, ?)
-            ON CONFLICT(currency) DO UPDATE SET
-                rate = excluded.rate,
-                fetched_at = excluded.fetched_at
-        """, (target_currency, rate, fetched_at))
+    Returns:
+        set: даты в формате 'YYYY-MM-DD'
+    """
+    with _lock:
+        rows = get_connection().execute("""
+            SELECT DISTINCT rate_date FROM rate_history
+            WHERE rate_date BETWEEN :start AND :end
+            UNION
+            SELECT rate_date FROM rate_history_gaps
+            WHERE rate_date BETWEEN :start AND :end
+            UNION
+            SELECT rate_date FROM rate_history_compacted
+            WHERE rate_date BETWEEN :start AND :end
+        """, {'start': start_date, 'end': end_date}).fetchall()
+    return {rate_date for rate_date, in rows}
 
 
 def get_saved_rate(target_currency: str) -> float:
     """
     Получение курса по имени валюты из БД
 
+    Курс читается из кэша в памяти; к БД запрос идёт только при промахе.
+
     Args:
         target_currency: код валюты (например, 'USD', 'EUR')
 
     Returns:
-        float: курс валюты
+        float: курс за одну единицу валюты
 
     Raises:
         ValueError: если валюта не найдена в БД
     """
-    with sqlite3.connect(DB_NAME) as conn:
-        cur = conn.cursor()
-
-        cur.execute("""
-            SELECT rate FROM rates
-            WHERE currency = ?
-            ORDER BY fetched_at DESC
-            LIMIT 1
-        """, (target_currency,))
+    with _lock:
+        cached = _rate_cache.get(target_currency)
+        if cached is not None:
+            return cached
 
-        result = cur.fetchone()
+        result = get_connection().execute(GET_RATE_SQL, (target_currency,)).fetchone()
 
         if result:
+            _rate_cache[target_currency] = result[0]
             return result[0]
         else:
             raise ValueError(f"Курс для валюты {target_currency} не найден в базе данных")
 
 
-# Инициализируем базу данных при импорте модуля
-init_db()
\ No newline at end of file
+def get_saved_currencies() -> List[str]:
+    """
+    Получение списка валют, курсы которых сохранены в БД
+
+    Returns:
+        list: коды валют в алфавитном порядке
+    """
+    with _lock:
+        rows = get_connection().execute("SELECT currency FROM rates ORDER BY currency").fetchall()
+    return [currency for currency, in rows]
+
+
+def get_saved_rates() -> Dict[str, float]:
+    """
+    Получение текущих курсов всех валют из БД одним запросом
+
+    Returns:
+        dict: код валюты -> курс за одну единицу валюты
+    """
+    return {currency: rate / nominal for currency, rate, nominal in get_rate_table()}
+
+
+def get_rate_table() -> List[Tuple[str, float, int]]:
+    """
+    Получение текущих курсов всех валют вместе с номиналами
+
+    Returns:
+        list: тройки (код валюты, курс за nominal единиц, nominal) по алфавиту
+    """
+    with _lock:
+        return get_connection().execute(
+            "SELECT currency, rate, nominal FROM rates ORDER BY currency"
+        ).fetchall()
+
+
+def get_rate_as_of(target_currency: str, rate_date: str) -> float:
+    """
+    Получение курса валюты, действовавшего на указанную дату
+
+    Берётся последний известный курс не позже даты (выходные и праздники
+    получают курс предыдущего рабочего дня).
+
+    Args:
+        target_currency: код валюты (например, 'USD', 'EUR')
+        rate_date: дата в формате 'YYYY-MM-DD'
+
+    Returns:
+        float: курс за одну единицу валюты
+
+    Raises:
+        ValueError: если курс на дату не найден в БД
+    """
+    with _lock:
+        result = get_connection().execute("""
+            SELECT rate / nominal FROM rate_history
+            WHERE currency = ? AND rate_date <= ?
+            ORDER BY rate_date DESC
+            LIMIT 1
+        """, (target_currency, rate_date)).fetchone()
+
+    if result:
+        return result[0]
+    raise ValueError(f"Курс для валюты {target_currency} на {rate_date} не найден в базе данных")
+
+
+def get_rate_range(target_currency: str, start_date: str, end_date: str) -> List[Tuple[str, float]]:
+    """
+    Получение истории курса валюты за период (границы включаются)
+
+    Args:
+        target_currency: код валюты (например, 'USD', 'EUR')
+        start_date: начало периода в формате 'YYYY-MM-DD'
+        end_date: конец периода в формате 'YYYY-MM-DD'
+
+    Returns:
+        list: пары (дата курса, курс за одну единицу) по возрастанию даты
+    """
+    with _lock:
+        return get_connection().execute("""
+            SELECT rate_date, rate / nominal FROM rate_history
+            WHERE currency = ? AND rate_date BETWEEN ? AND ?
+            ORDER BY rate_date
+        """, (target_currency, start_date, end_date)).fetchall()
+
+
+def get_latest_rates() -> Dict[str, float]:
+    """
+    Получение последнего известного курса для всех валют из истории
+
+    Валюты перебираются прыжками по первичному ключу (skip-scan), а для
+    каждой берётся последняя запись, поэтому запрос не читает всю историю.
+
+    Returns:
+        dict: код валюты -> последний курс за одну единицу валюты
+    """
+    with _lock:
+        rows = get_connection().execute("""
+            WITH RECURSIVE currencies(currency) AS (
+                SELECT MIN(currency) FROM rate_history
+                UNION ALL
+                SELECT (SELECT MIN(currency) FROM rate_history WHERE currency > currencies.currency)
+                FROM currencies WHERE currencies.currency IS NOT NULL
+            )
+            SELECT currency, (
+                SELECT rate / nominal FROM rate_history h
+                WHERE h.currency = currencies.currency
+                ORDER BY rate_date DESC
+                LIMIT 1
+            )
+            FROM currencies WHERE currency IS NOT NULL
+        """).fetchall()
+    return dict(rows)
+
+
+def compact_history(daily_days: Optional[int] = None, retention_days: Optional[int] = None,
+                    today: Optional[str] = None) -> int:
+    """
+    Прореживание и очистка истории курсов
+
+    Если задан daily_days, дневные курсы хранятся за последние daily_days
+    дней, а для более старых периодов остаётся один курс на месяц (последний
+    в месяце). Если задан retention_days, записи старше этого срока
+    удаляются полностью. Если не задано ни то, ни другое, ничего не удаляется.
+
+    Даты, курсы или отметки о днях без публикации за которые удалены
+    при прореживании, запоминаются, поэтому backfill не загружает их повторно.
+    Даты, которые никогда не загружались, остаются незагруженными.
+
+    Вызывается после каждого сохранения курсов с датой, поэтому прореживание
+    включается только явной настройкой HISTORY_DAILY_DAYS; если удалять
+    нечего, БД не изменяется.
+
+    Args:
+        daily_days: сколько дней хранить дневные курсы без прореживания
+                    (по умолчанию - HISTORY_DAILY_DAYS; None - не прореживать)
+        retention_days: полный срок хранения истории в днях
+                        (по умолчанию - HISTORY_RETENTION_DAYS)
+        today: текущая дата в формате 'YYYY-MM-DD' (по умолчанию - сегодня)
+
+    Returns:
+        int: количество удалённых записей истории
+    """
+    if daily_days is None:
+        daily_days = HISTORY_DAILY_DAYS
+    if retention_days is None:
+        retention_days = HISTORY_RETENTION_DAYS
+    current = datetime.fromisoformat(today) if today else datetime.now()
+
+    with _lock:
+        conn = get_connection()
+        with conn:
+            deleted = 0
+            if retention_days is not None:
+                retention_cutoff = (current - timedelta(days=retention_days)).date().isoformat()
+                deleted += conn.execute(
+                    "DELETE FROM rate_history WHERE rate_date < ?", (retention_cutoff,)
+                ).rowcount
+                conn.execute("DELETE FROM rate_history_gaps WHERE rate_date < ?", (retention_cutoff,))
+                conn.execute("DELETE FROM rate_history_compacted WHERE rate_date < ?", (retention_cutoff,))
+
+            if daily_days is None:
+                return deleted
+
+            # Запоминаем только даты, которые действительно теряют записи
+            daily_cutoff = (current - timedelta(days=daily_days)).date().isoformat()
+            thinned = conn.execute("""
+                SELECT rate_date FROM rate_history
+                WHERE rate_date < :cutoff
+                  AND (currency, rate_date) NOT IN (
+                      SELECT currency, MAX(rate_date) FROM rate_history
+                      WHERE rate_date < :cutoff
+                      GROUP BY currency, substr(rate_date, 1, 7)
+                  )
+                UNION
+                SELECT rate_date FROM rate_history_gaps
+                WHERE rate_date < :cutoff
+            """, {'cutoff': daily_cutoff}).fetchall()
+            if thinned:
+                conn.executemany("INSERT OR IGNORE INTO rate_history_compacted (rate_date) VALUES (?)", thinned)
+                conn.execute("DELETE FROM rate_history_gaps WHERE rate_date < ?", (daily_cutoff,))
+                deleted += conn.execute("""
+                    DELETE FROM rate_history
+                    WHERE rate_date < :cutoff
+                      AND (currency, rate_date) NOT IN (
+                          SELECT currency, MAX(rate_date) FROM rate_history
+                          WHERE rate_date < :cutoff
+                          GROUP BY currency, substr(rate_date, 1, 7)
+                      )
+                """, {'cutoff': daily_cutoff}).rowcount
+    return deleted
+
+
+atexit.register(close_connection)
@@ -0,0 +1,401 @@
+"""
+Расчёт графиков погашения кредита.
+
+Поддерживаются аннуитетные и дифференцированные платежи, а также досрочные
+погашения с сокращением срока или с уменьшением платежа. Вычисления выполняются
+над массивами NumPy: остаток долга на каждый месяц считается по замкнутой
+формуле, без помесячного цикла на Python.
+"""
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+ANNUITY = 'annuity'
+DIFFERENTIATED = 'differentiated'
+
+REDUCE_TERM = 'term'
+REDUCE_PAYMENT = 'payment'
+
+# Остаток меньше этой величины считается погашенным (погрешность float)
+BALANCE_EPS = 1e-6
+
+
+@dataclass
+class LoanSchedule:
+    """
+    График погашения кредита.
+
+    Все массивы имеют одинаковую длину - количество месяцев выплат.
+    """
+    month: np.ndarray
+    payment: np.ndarray
+    principal: np.ndarray
+    interest: np.ndarray
+    balance: np.ndarray
+
+    @property
+    def total_payment(self) -> float:
+        """Сумма всех платежей."""
+        return float(self.payment.sum())
+
+    @property
+    def total_interest(self) -> float:
+        """Сумма начисленных процентов."""
+        return float(self.interest.sum())
+
+    def __len__(self) -> int:
+        return len(self.month)
+
+
+@dataclass(frozen=True)
+class LoanResult:
+    """
+    Итоги расчёта кредита (в рублях).
+
+    Для дифференцированных платежей monthly_payment - первый (наибольший)
+    платёж, last_payment - последний; для аннуитетных они совпадают.
+    """
+    amount: float
+    months: int
+    annual_rate: float
+    kind: str
+    monthly_payment: float
+    last_payment: float
+    total_payment: float
+    total_interest: float
+
+
+def annuity_payment(amount, months, annual_rate):
+    """
+    Рассчитывает ежемесячный аннуитетный платёж.
+
+    Принимает как числа, так и массивы NumPy (расчёт сразу для многих кредитов).
+
+    Args:
+        amount: Сумма кредита
+        months: Срок кредита в месяцах
+        annual_rate: Годовая процентная ставка в процентах
+
+    Returns:
+        Ежемесячный платёж (число или массив той же формы)
+    """
+    amount = np.asarray(amount, dtype=float)
+    months = np.asarray(months, dtype=float)
+    monthly_rate = np.asarray(annual_rate, dtype=float) / 100 / 12
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        growth = (1 + monthly_rate) ** months
+        payment = np.where(monthly_rate == 0,
+                           amount / months,
+                           amount * monthly_rate * growth / (growth - 1))
+    return payment[()] if payment.ndim == 0 else payment
+
+
+def payment_totals(amount, months, annual_rate, kind: str = ANNUITY):
+    """
+    Первый платёж и переплата по замкнутым формулам, без построения графика.
+
+    Принимает как числа, так и массивы NumPy.
+
+    Args:
+        amount: Сумма кредита
+        months: Срок кредита в месяцах
+        annual_rate: Годовая процентная ставка в процентах
+        kind: Тип платежей (ANNUITY или DIFFERENTIATED)
+
+    Returns:
+        tuple: Первый платёж и сумма начисленных процентов
+
+    Raises:
+        ValueError: Если тип платежей неизвестен
+    """
+    if kind == ANNUITY:
+        payment = annuity_payment(amount, months, annual_rate)
+        return payment, payment * np.asarray(months, dtype=float) - amount
+    if kind == DIFFERENTIATED:
+        amount = np.asarray(amount, dtype=float)
+        months = np.asarray(months, dtype=float)
+        monthly_rate = np.asarray(annual_rate, dtype=float) / 100 / 12
+        # Проценты начисляются на остатки amount * (n - k + 1) / n, k = 1..n
+        payment = amount / months + amount * monthly_rate
+        interest = amount * monthly_rate * (months + 1) / 2
+        if payment.ndim == 0:
+            return payment[()], interest[()]
+        return payment, interest
+    raise ValueError(f"Неизвестный тип платежей: {kind}")
+
+
+def loan_summary(amount: float, months: int, annual_rate: float, kind: str = ANNUITY) -> LoanResult:
+    """
+    Рассчитывает итоги кредита.
+
+    Args:
+        amount: Сумма кредита
+        months: Срок кредита в месяцах
+        annual_rate: Годовая процентная ставка в процентах
+        kind: Тип платежей (ANNUITY или DIFFERENTIATED)
+
+    Returns:
+        LoanResult: Первый и последний платежи, сумма всех платежей и переплата
+
+    Raises:
+        ValueError: Если тип платежей неизвестен
+    """
+    payment, interest = payment_totals(amount, months, annual_rate, kind)
+    monthly_payment = float(payment)
+    last_payment = monthly_payment
+    if kind == DIFFERENTIATED:
+        last_payment = amount / months * (1 + annual_rate / 100 / 12)
+    total_interest = float(interest)
+    return LoanResult(amount, months, annual_rate, kind, monthly_payment, last_payment,
+                      amount + total_interest, total_interest)
+
+
+def _balances(balance: float, monthly_rate: float, kind: str, level: float, length: int) -> np.ndarray:
+    """
+    Остатки долга на конец каждого из length месяцев без досрочных погашений.
+
+    Args:
+        balance: Остаток долга в начале периода
+        monthly_rate: Месячная ставка (доля)
+        kind: Тип платежей (ANNUITY или DIFFERENTIATED)
+        level: Аннуитетный платёж или ежемесячная доля основного долга
+        length: Количество месяцев
+
+    Returns:
+        np.ndarray: Остатки долга (могут уходить в минус после полного погашения)
+    """
+    k = np.arange(1, length + 1, dtype=float)
+    if kind == DIFFERENTIATED:
+        return balance - level * k
+    if monthly_rate == 0:
+        return balance - level * k
+    growth = (1 + monthly_rate) ** k
+    return balance * growth - level * (growth - 1) / monthly_rate
+
+
+def _level(balance: float, monthly_rate: float, kind: str, remaining: int) -> float:
+    """
+    Размер платежа (или доли основного долга) для погашения остатка за remaining месяцев.
+
+    Args:
+        balance: Остаток долга
+        monthly_rate: Месячная ставка (доля)
+        kind: Тип платежей (ANNUITY или DIFFERENTIATED)
+        remaining: Оставшийся срок в месяцах
+
+    Returns:
+        float: Аннуитетный платёж или ежемесячная доля основного долга
+    """
+    if kind == DIFFERENTIATED:
+        return balance / remaining
+    return float(annuity_payment(balance, remaining, monthly_rate * 12 * 100))
+
+
+def build_schedule(amount: float, months: int, annual_rate: float, kind: str = ANNUITY,
+                   early_repayments: Optional[Dict[int, float]] = None,
+                   reduce: str = REDUCE_TERM) -> LoanSchedule:
+    """
+    Строит помесячный график погашения кредита.
+
+    Досрочные погашения вносятся вместе с плановым платежом указанного месяца.
+    График считается отрезками между досрочными погашениями; внутри отрезка
+    все месяцы вычисляются одной векторной операцией.
+
+    Args:
+        amount: Сумма кредита
+        months: Срок кредита в месяцах
+        annual_rate: Годовая процентная ставка в процентах
+        kind: Тип платежей (ANNUITY или DIFFERENTIATED)
+        early_repayments: Досрочные погашения: номер месяца (с 1) -> сумма
+        reduce: Что уменьшать после досрочного погашения:
+                REDUCE_TERM - срок, REDUCE_PAYMENT - платёж
+
+    Returns:
+        LoanSchedule: График погашения
+
+    Raises:
+        ValueError: Если параметры кредита некорректны
+    """
+    if amount <= 0 or months <= 0 or annual_rate < 0:
+        raise ValueError("Сумма и срок кредита должны быть больше нуля, ставка - неотрицательной")
+    if kind not in (ANNUITY, DIFFERENTIATED):
+        raise ValueError(f"Неизвестный тип платежей: {kind}")
+    if reduce not in (REDUCE_TERM, REDUCE_PAYMENT):
+        raise ValueError(f"Неизвестный способ досрочного погашения: {reduce}")
+
+    months = int(months)
+    monthly_rate = annual_rate / 100 / 12
+    extras = {m: e for m, e in (early_repayments or {}).items() if 1 <= m <= months and e > 0}
+    boundaries = sorted(extras) + [months]
+
+    balance = float(amount)
+    level = _level(balance, monthly_rate, kind, months)
+    start = 0
+    parts = []
+
+    for end in boundaries:
+        if end <= start or balance <= BALANCE_EPS:
+            continue
+
+        closing = _balances(balance, monthly_rate, kind, level, end - start)
+        paid_off = np.flatnonzero(closing <= BALANCE_EPS)
+        if paid_off.size:
+            closing = closing[:paid_off[0] + 1]
+            closing[-1] = 0.0
+        if start + len(closing) == months:
+            closing[-1] = 0.0
+
+        opening = np.concatenate(([balance], closing[:-1]))
+        interest = opening * monthly_rate
+        principal = opening - closing
+
+        finished = closing[-1] == 0.0
+        if not finished and start + len(closing) in extras:
+            extra = min(extras[start + len(closing)], closing[-1])
+            principal[-1] += extra
+            closing[-1] -= extra
+            if closing[-1] <= BALANCE_EPS:
+                closing[-1] = 0.0
+
+        parts.append((interest, principal, closing))
+        start += len(closing)
+        balance = float(closing[-1])
+
+        if balance > 0 and reduce == REDUCE_PAYMENT:
+            level = _level(balance, monthly_rate, kind, months - start)
+        if paid_off.size or balance == 0.0:
+            break
+
+    interest = np.concatenate([part[0] for part in parts])
+    principal = np.concatenate([part[1] for part in parts])
+    closing = np.concatenate([part[2] for part in parts])
+    return LoanSchedule(
+        month=np.arange(1, len(closing) + 1),
+        payment=principal + interest,
+        principal=principal,
+        interest=interest,
+        balance=closing
+    )
+
+
+def build_schedules(amounts, months, annual_rates,
+                    kind: str = ANNUITY) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Строит графики погашения сразу для многих кредитов без досрочных погашений.
+
+    Результат - двумерные массивы (кредит x месяц) длиной в самый долгий срок;
+    месяцы после окончания кредита заполнены нулями.
+
+    Args:
+        amounts: Суммы кредитов
+        months: Сроки кредитов в месяцах
+        annual_rates: Годовые процентные ставки в процентах
+        kind: Тип платежей (ANNUITY или DIFFERENTIATED)
+
+    Returns:
+        tuple: Массивы платежей, основного долга, процентов и остатков
+    """
+    amounts = np.asarray(amounts, dtype=float).reshape(-1, 1)
+    terms = np.asarray(months, dtype=int).reshape(-1, 1)
+    monthly_rates = np.asarray(annual_rates, dtype=float).reshape(-1, 1) / 100 / 12
+
+    k = np.arange(1, int(terms.max()) + 1, dtype=float)
+    active = k <= terms
+
+    if kind == DIFFERENTIATED:
+        closing = amounts - amounts / terms * k
+    elif kind == ANNUITY:
+        payment = annuity_payment(amounts, terms, monthly_rates * 12 * 100)
+        growth = (1 + monthly_rates) ** k
+        with np.errstate(divide='ignore', invalid='ignore'):
+            closing = np.where(monthly_rates == 0,
+                               amounts - payment * k,
+                               amounts * growth - payment * (growth - 1) / monthly_rates)
+    else:
+        raise ValueError(f"Неизвестный тип платежей: {kind}")
+
+    closing = np.where(active & (k < terms), np.maximum(closing, 0.0), 0.0)
+    opening = np.concatenate((amounts, closing[:, :-1]), axis=1)
+    opening = np.where(active, opening, 0.0)
+
+    interest = opening * monthly_rates
+    principal = opening - closing
+    return principal + interest, principal, interest, closing
+
+
+def grid_axes(annual_rate: float, months: int, radius: int = 2, rate_step: float = 1.0,
+              term_step: int = 12) -> Tuple[List[float], List[int]]:
+    """
+    Значения ставок и сроков вокруг заданной точки для таблицы "что если".
+
+    Неположительные ставки и сроки отбрасываются.
+
+    Args:
+        annual_rate: Центральная годовая ставка в процентах
+        months: Центральный срок в месяцах
+        radius: Количество шагов в каждую сторону от центра
+        rate_step: Шаг по ставке, процентные пункты
+        term_step: Шаг по сроку, месяцы
+
+    Returns:
+        tuple: Список ставок и список сроков по возрастанию
+    """
+    offsets = range(-radius, radius + 1)
+    rates = [round(annual_rate + rate_step * k, 4) for k in offsets]
+    terms = [int(months + term_step * k) for k in offsets]
+    return [rate for rate in rates if rate > 0], [term for term in terms if term > 0]
+
+
+class SensitivityGrid:
+    """
+    Таблица ежемесячного платежа и переплаты для сетки ставок и сроков.
+
+    Результаты запоминаются по ячейкам (сумма, ставка, срок, тип платежей), поэтому при сдвиге
+    центра сетки пересчитываются только новые ячейки - одной векторной операцией.
+    """
+
+    def __init__(self, max_cells: int = 100_000):
+        """
+        Инициализация кэша ячеек.
+
+        Args:
+            max_cells: Максимальное количество запоминаемых ячеек
+        """
+        self.max_cells = max_cells
+        self._cells: OrderedDict = OrderedDict()
+
+    def compute(self, amount: float, rates: List[float], terms: List[int],
+                kind: str = ANNUITY) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Рассчитывает сетку ставки x сроки для суммы кредита.
+
+        Args:
+            amount: Сумма кредита
+            rates: Годовые ставки в процентах (строки таблицы)
+            terms: Сроки в месяцах (столбцы таблицы)
+            kind: Тип платежей (ANNUITY или DIFFERENTIATED)
+
+        Returns:
+            tuple: Массивы первых платежей и переплат формы (ставки, сроки)
+        """
+        keys = [(float(amount), round(float(rate), 4), int(term), kind) for rate in rates for term in terms]
+        missing = [key for key in dict.fromkeys(keys) if key not in self._cells]
+
+        if missing:
+            values = np.array([key[:3] for key in missing], dtype=float)
+            payments, interest = payment_totals(values[:, 0], values[:, 2], values[:, 1], kind)
+            for key, payment, overpay in zip(missing, payments.tolist(), interest.tolist()):
+                self._cells[key] = (payment, overpay)
+            while len(self._cells) > self.max_cells:
+                self._cells.popitem(last=False)
+
+        cells = []
+        for key in keys:
+            self._cells.move_to_end(key)
+            cells.append(self._cells[key])
+
+        result = np.array(cells, dtype=float).reshape(len(rates), len(terms), 2)
+        return result[:, :, 0], result[:, :, 1]
@@ -0,0 +1,97 @@
+"""
+Панель логов для Tk-приложения с ограниченным объёмом и пакетной отрисовкой.
+
+Сообщения складываются в очередь и выводятся в виджет пачками по таймеру,
+поэтому сколько бы сообщений ни пришло, перерисовка выполняется не чаще
+одного раза за интервал. Виджет хранит не больше max_lines строк: старые
+строки удаляются. Дополнительно лог может дублироваться в файл с ротацией.
+"""
+import logging
+import tkinter as tk
+from collections import deque
+from logging.handlers import RotatingFileHandler
+from typing import Optional
+
+
+class LogPanel:
+    """
+    Буферизованный вывод лога в tk.Text.
+
+    Метод log можно вызывать из любого потока: очередь сообщений - deque,
+    а с виджетом работает только таймер в главном потоке.
+    """
+
+    def __init__(self, text: tk.Text, max_lines: int = 1000, flush_interval_ms: int = 100,
+                 log_file: Optional[str] = None, max_bytes: int = 1_000_000, backup_count: int = 3):
+        """
+        Инициализация панели логов.
+
+        Args:
+            text: Виджет для вывода сообщений
+            max_lines: Максимальное количество строк в виджете
+            flush_interval_ms: Интервал вывода накопленных сообщений, мс
+            log_file: Файл для дублирования лога (опционально)
+            max_bytes: Размер файла лога, после которого он ротируется
+            backup_count: Количество хранимых старых файлов лога
+        """
+        self.text = text
+        self.max_lines = max_lines
+        self.flush_interval_ms = flush_interval_ms
+        self.lines = 0
+
+        # Кольцевой буфер: если сообщений больше, чем помещается в виджет,
+        # самые старые из ещё не выведенных отбрасываются сразу
+        self.pending: deque = deque(maxlen=max_lines)
+
+        self.file_logger: Optional[logging.Logger] = None
+        if log_file:
+            handler = RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count,
+                                          encoding='utf-8')
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            self.file_logger = logging.getLogger(f"{__name__}.{id(self)}")
+            self.file_logger.setLevel(logging.INFO)
+            self.file_logger.propagate = False
+            self.file_logger.addHandler(handler)
+
+        self.text.after(self.flush_interval_ms, self._tick)
+
+    def log(self, message: str):
+        """
+        Добавляет сообщение в очередь вывода.
+
+        Args:
+            message: Текст сообщения
+        """
+        self.pending.append(message)
+        if self.file_logger is not None:
+            self.file_logger.info(message)
+
+    def flush(self):
+        """
+        Выводит все накопленные сообщения в виджет одной вставкой.
+
+        Лишние строки в начале виджета удаляются.
+        """
+        batch = []
+        while True:
+            try:
+                batch.append(self.pending.popleft())
+            except IndexError:
+                break
+        if not batch:
+            return
+
+        self.text.insert(tk.END, "\n".join(batch) + "\n")
+        self.lines += sum(message.count("\n") + 1 for message in batch)
+
+        excess = self.lines - self.max_lines
+        if excess > 0:
+            self.text.delete("1.0", f"{excess + 1}.0")
+            self.lines = self.max_lines
+
+        self.text.see(tk.END)
+
+    def _tick(self):
+        """Периодически выводит накопленные сообщения."""
+        self.flush()
+        self.text.after(self.flush_interval_ms, self._tick)
@@ -1,7 +1,51 @@
+import time
+
+# Отметка начала запуска для измерения времени старта приложения
+START_TIME = time.perf_counter()
+
+import queue
+import threading
 import tkinter as tk
+from collections import OrderedDict
 from tkinter import ttk
-from db import init_db, save_rate, get_saved_rate
+from typing import TYPE_CHECKING, Optional, Tuple
+from db import compact_history, get_saved_currencies, init_db, save_rates_bulk
 from api import fetch_rates
+from log_panel import LogPanel
+from timing import CALC, DB, NETWORK, UI, ActionTimer
+
+# Модули loan и converter импортируются лениво при первом расчёте:
+# они тянут за собой NumPy, импорт которого заметно замедляет старт,
+# а при запуске список валют читается из БД без них
+if TYPE_CHECKING:
+    from converter import ConversionTable
+    from loan import LoanResult, SensitivityGrid
+
+# Интервал опроса результатов фонового обновления курсов, мс
+REFRESH_POLL_MS = 100
+
+# Лог действий: сколько строк хранить в окне, как часто выводить
+# накопленные сообщения (мс) и файл для дублирования лога (None - не писать)
+LOG_MAX_LINES = 1000
+LOG_FLUSH_MS = 100
+LOG_FILE = None
+
+# Живой пересчёт: пауза после последнего изменения полей ввода (мс)
+# и сколько последних результатов хранить в кэше
+RECALC_DELAY_MS = 300
+RESULT_CACHE_SIZE = 256
+
+# Показатели таблицы "что если"
+SENSITIVITY_METRICS = ("Ежемесячный платеж", "Переплата")
+
+# Ключ кэша результатов: (сумма, срок, ставка, тип платежей, валюта)
+ResultKey = Tuple[float, int, float, str, str]
+
+# Типы платежей для выпадающего списка (значения - loan.ANNUITY и loan.DIFFERENTIATED)
+PAYMENT_KINDS = {
+    "Аннуитетный": 'annuity',
+    "Дифференцированный": 'differentiated',
+}
 
 
 class CurrencyConverterApp(tk.Tk):
@@ -26,7 +70,7 @@ class CurrencyConverterApp(tk.Tk):
 
         # Настройка главного окна
         self.title("Калькулятор кредита с конвертацией")
-        self.geometry("500x600")
+        self.geometry("900x650")
 
         # Инициализация переменных
         self.loan_var = tk.DoubleVar(value=0.0)
@@ -34,15 +78,53 @@ class CurrencyConverterApp(tk.Tk):
         self.annual_interest_var = tk.DoubleVar(value=0.0)
         self.base_var = tk.StringVar(value="RUB")
         self.target_var = tk.StringVar(value="USD")
+        self.payment_kind_var = tk.StringVar(value="Аннуитетный")
+        self.sensitivity_metric_var = tk.StringVar(value=SENSITIVITY_METRICS[0])
+
+        # Таблица "что если" с запоминанием уже рассчитанных ячеек
+        self.sensitivity: Optional['SensitivityGrid'] = None
+        self.sensitivity_center = None
+
+        # Таблица кросс-курсов; перестраивается после каждого обновления курсов
+        self.conversion: Optional['ConversionTable'] = None
+
+        # Результаты последнего расчёта; надписи только отображают их
+        self.loan_result: Optional['LoanResult'] = None
+        self.converted_payment: Optional[float] = None
+
+        # Живой пересчёт: отложенный запуск и кэш результатов
+        # по ключу (сумма, срок, ставка, валюта)
+        self.recalc_job: Optional[str] = None
+        self.result_cache: OrderedDict = OrderedDict()
+        self.shown_key: Optional[ResultKey] = None
+
+        # Фоновое обновление курсов: результаты передаются из рабочего
+        # потока через очередь и забираются в главном потоке через after()
+        self.refresh_queue: queue.Queue = queue.Queue()
+        self.refresh_cancel: Optional[threading.Event] = None
+        self.refresh_polling = False
 
         # Создание виджетов
         self.create_widgets()
 
+        # Пересчёт при изменении полей ввода
+        for var in (self.loan_var, self.loan_time_var, self.annual_interest_var,
+                    self.payment_kind_var, self.target_var):
+            var.trace_add("write", self.schedule_recalculation)
+
         # Инициализация БД
         self.init_db()
 
-        # Загрузка валют
-        self.load_currencies()
+        # Загрузка валют из локальной БД (сеть - только если БД пуста)
+        self.load_saved_currencies()
+
+        # Время запуска измеряется до первой отрисовки окна
+        self.after_idle(self.report_startup_time)
+
+    def report_startup_time(self):
+        """Логирует время от запуска программы до готовности окна."""
+        elapsed = (time.perf_counter() - START_TIME) * 1000
+        self.log(f"Приложение запущено за {elapsed:.0f} мс")
 
     def init_db(self):
         """Инициализирует базу данных при запуске приложения."""
@@ -84,12 +166,20 @@ class CurrencyConverterApp(tk.Tk):
         ttk.Entry(params_frame, textvariable=self.annual_interest_var, width=15).grid(row=2, column=1, padx=5)
         ttk.Label(params_frame, text="%").grid(row=2, column=2, sticky="w")
 
-        ttk.Button(params_frame, text="Рассчитать", command=self.calculate_loan).grid(row=3, column=0, columnspan=3,
-                                                                                      pady=10)
+        ttk.Label(params_frame, text="Тип платежей:").grid(row=3, column=0, sticky="w")
+        ttk.Combobox(params_frame, textvariable=self.payment_kind_var, values=list(PAYMENT_KINDS),
+                     state="readonly", width=18).grid(row=3, column=1, columnspan=2, padx=5, sticky="w")
+
+        ttk.Button(params_frame, text="Рассчитать", command=self.calculate_loan).grid(row=4, column=0, pady=10)
+        ttk.Button(params_frame, text="График платежей", command=self.show_schedule).grid(row=4, column=1,
+                                                                                         columnspan=2, pady=10)
 
         # Результаты кредита
-        results_frame = ttk.LabelFrame(main_frame, text="Результаты расчёта", padding="10")
-        results_frame.pack(fill=tk.X, pady=5)
+        results_row = ttk.Frame(main_frame)
+        results_row.pack(fill=tk.X, pady=5)
+
+        results_frame = ttk.LabelFrame(results_row, text="Результаты расчёта", padding="10")
+        results_frame.pack(side="left", fill=tk.Y)
 
         self.monthly_label = ttk.Label(results_frame, text="Ежемесячный платеж: 0 RUB")
         self.monthly_label.pack(anchor="w")
@@ -100,6 +190,19 @@ class CurrencyConverterApp(tk.Tk):
         self.interest_label = ttk.Label(results_frame, text="Начисленные проценты: 0 RUB")
         self.interest_label.pack(anchor="w")
 
+        # Таблица "что если": платеж или переплата для соседних ставок и сроков
+        sensitivity_frame = ttk.LabelFrame(results_row, text="Что если: ставка × срок", padding="10")
+        sensitivity_frame.pack(side="left", fill=tk.BOTH, expand=True, padx=(5, 0))
+
+        metric_combobox = ttk.Combobox(sensitivity_frame, textvariable=self.sensitivity_metric_var,
+                                       values=SENSITIVITY_METRICS, state="readonly", width=20)
+        metric_combobox.pack(anchor="w")
+        metric_combobox.bind("<<ComboboxSelected>>", lambda event: self.show_sensitivity())
+
+        self.sensitivity_tree = ttk.Treeview(sensitivity_frame, show="headings", height=5)
+        self.sensitivity_tree.tag_configure("center", background="#e6f0ff")
+        self.sensitivity_tree.pack(fill=tk.BOTH, expand=True, pady=(5, 0))
+
         # Конвертация валют
         convert_frame = ttk.LabelFrame(main_frame, text="Конвертация валют", padding="10")
         convert_frame.pack(fill=tk.X, pady=5)
@@ -112,10 +215,18 @@ class CurrencyConverterApp(tk.Tk):
         self.target_combobox.grid(row=1, column=1, padx=5)
 
         ttk.Button(convert_frame, text="Конвертировать", command=self.convert).grid(row=2, column=0, pady=5)
-        ttk.Button(convert_frame, text="Обновить курсы", command=self.update_db).grid(row=2, column=1, pady=5)
+        self.update_button = ttk.Button(convert_frame, text="Обновить курсы", command=self.update_db)
+        self.update_button.grid(row=2, column=1, pady=5)
+        self.cancel_button = ttk.Button(convert_frame, text="Отмена", command=self.cancel_refresh,
+                                        state="disabled")
+        self.cancel_button.grid(row=2, column=2, pady=5)
+        ttk.Button(convert_frame, text="Во все валюты", command=self.convert_all).grid(row=2, column=3, pady=5)
+
+        self.progress = ttk.Progressbar(convert_frame, mode="indeterminate", length=200)
+        self.progress.grid(row=3, column=0, columnspan=4, pady=5)
 
         self.result_label = ttk.Label(convert_frame, text="", foreground="blue")
-        self.result_label.grid(row=3, column=0, columnspan=2)
+        self.result_label.grid(row=4, column=0, columnspan=4)
 
         # Лог
         log_frame = ttk.LabelFrame(main_frame, text="Лог действий", padding="10")
@@ -128,16 +239,20 @@ class CurrencyConverterApp(tk.Tk):
         self.log_text.pack(side="left", fill=tk.BOTH, expand=True)
         scrollbar.pack(side="right", fill=tk.Y)
 
+        self.log_panel = LogPanel(self.log_text, max_lines=LOG_MAX_LINES,
+                                  flush_interval_ms=LOG_FLUSH_MS, log_file=LOG_FILE)
+
     def log(self, message: str):
         """
         Добавляет сообщение в лог приложения.
 
+        Сообщение выводится в окно вместе с другими накопленными
+        сообщениями при ближайшем срабатывании таймера панели логов.
+
         Args:
             message: Текст сообщения для логирования
         """
-        self.log_text.insert(tk.END, f"{message}\n")
-        self.log_text.see(tk.END)
-        self.update_idletasks()
+        self.log_panel.log(message)
 
     def is_loan_invalid(self, value: float, field_name: str) -> bool:
         """
@@ -162,15 +277,16 @@ class CurrencyConverterApp(tk.Tk):
 
     def calculate_loan(self):
         """
-        Рассчитывает параметры кредита по аннуитетной формуле.
+        Рассчитывает параметры кредита по выбранному типу платежей.
 
         Вычисляет:
-        - ежемесячный платеж
+        - ежемесячный платеж (для дифференцированных - первый и последний)
         - общую сумму выплат
         - сумму начисленных процентов
 
         Результаты отображаются в интерфейсе и логируются.
         """
+        timer = ActionTimer("Рассчитать")
         try:
             loan_amount = self.loan_var.get()
             loan_months = self.loan_time_var.get()
@@ -181,95 +297,538 @@ class CurrencyConverterApp(tk.Tk):
                     self.is_loan_invalid(annual_rate, "Процентная ставка")):
                 return
 
-            monthly_rate = annual_rate / 100 / 12
-            if monthly_rate == 0:
-                monthly_payment = loan_amount / loan_months
-            else:
-                monthly_payment = (loan_amount * monthly_rate *
-                                   (1 + monthly_rate) ** loan_months) / \
-                                  ((1 + monthly_rate) ** loan_months - 1)
+            key = (loan_amount, loan_months, annual_rate, PAYMENT_KINDS[self.payment_kind_var.get()],
+                   self.target_var.get().upper())
+            with timer.measure(CALC):
+                result, converted = self.compute_results(key)
 
-            total_payment = monthly_payment * loan_months
-            total_interest = total_payment - loan_amount
-
-            self.monthly_label.config(text=f"Ежемесячный платеж: {monthly_payment:,.2f} RUB")
-            self.loan_sum_label.config(text=f"Сумма всех платежей: {total_payment:,.2f} RUB")
-            self.interest_label.config(text=f"Начисленные проценты: {total_interest:,.2f} RUB")
+            self.show_results(key, result, converted, timer)
 
             self.log("Расчёт кредита выполнен успешно")
+            self.log(timer.report())
 
         except Exception as e:
             self.log(f"Ошибка при расчёте кредита: {e}")
 
+    def schedule_recalculation(self, *args):
+        """
+        Откладывает пересчёт до паузы во вводе.
+
+        Вызывается при каждом изменении полей ввода. Предыдущий отложенный
+        пересчёт отменяется, поэтому быстрый ввод приводит к одному расчёту.
+        """
+        if self.recalc_job is not None:
+            self.after_cancel(self.recalc_job)
+        self.recalc_job = self.after(RECALC_DELAY_MS, self.recalculate)
+
+    def read_inputs(self) -> Optional[ResultKey]:
+        """
+        Читает параметры из полей ввода без сообщений об ошибках.
+
+        Returns:
+            Optional[tuple]: (сумма, срок, ставка, тип платежей, валюта) или None,
+                             если ввод неполный или некорректный
+        """
+        try:
+            key = (self.loan_var.get(), self.loan_time_var.get(), self.annual_interest_var.get(),
+                   PAYMENT_KINDS[self.payment_kind_var.get()], self.target_var.get().upper())
+        except (tk.TclError, ValueError, KeyError):
+            return None
+        if min(key[:3]) <= 0:
+            return None
+        return key
+
+    def recalculate(self):
+        """
+        Пересчитывает кредит и конвертацию по текущим значениям полей.
+
+        Пока ввод неполный (например, поле очищено), на экране остаются
+        прежние результаты. Неизменившиеся параметры не пересчитываются.
+        """
+        self.recalc_job = None
+        key = self.read_inputs()
+        if key is None or key == self.shown_key:
+            return
+        try:
+            self.show_results(key, *self.compute_results(key))
+        except Exception as e:
+            self.log(f"Ошибка при пересчёте: {e}")
+
+    def compute_results(self, key: ResultKey) -> Tuple['LoanResult', Optional[float]]:
+        """
+        Рассчитывает кредит и платеж в целевой валюте с запоминанием результатов.
+
+        Args:
+            key: (сумма, срок, ставка, тип платежей, валюта)
+
+        Returns:
+            tuple: Итоги кредита и платеж в целевой валюте
+                   (None, если курсов нет или валюта не найдена)
+        """
+        cached = self.result_cache.get(key)
+        if cached is not None:
+            self.result_cache.move_to_end(key)
+            return cached
+
+        from loan import loan_summary
+
+        amount, months, annual_rate, kind, currency = key
+        result = loan_summary(amount, months, annual_rate, kind)
+        converted = None
+        conversion = self.get_conversion()
+        if conversion is not None and currency in conversion:
+            converted = conversion.convert(result.monthly_payment, currency)
+
+        self.result_cache[key] = (result, converted)
+        if len(self.result_cache) > RESULT_CACHE_SIZE:
+            self.result_cache.popitem(last=False)
+        return result, converted
+
+    def show_results(self, key: ResultKey, result: 'LoanResult',
+                     converted: Optional[float], timer: Optional[ActionTimer] = None):
+        """
+        Запоминает результаты расчёта и выводит их в надписи.
+
+        Таблица "что если" перестраивается, только если изменились
+        параметры кредита, а не целевая валюта.
+
+        Args:
+            key: (сумма, срок, ставка, тип платежей, валюта)
+            result: Итоги кредита
+            converted: Платеж в целевой валюте (None - не рассчитан)
+            timer: Таймер действия, в который добавляется время (опционально)
+        """
+        timer = timer or ActionTimer("Пересчёт")
+        self.loan_result = result
+        self.converted_payment = converted
+        self.shown_key = key
+        currency = key[-1]
+
+        if result.last_payment != result.monthly_payment:
+            monthly_text = (f"Ежемесячный платеж: {result.monthly_payment:,.2f} → "
+                            f"{result.last_payment:,.2f} RUB")
+        else:
+            monthly_text = f"Ежемесячный платеж: {result.monthly_payment:,.2f} RUB"
+
+        with timer.measure(UI):
+            self.monthly_label.config(text=monthly_text)
+            self.loan_sum_label.config(text=f"Сумма всех платежей: {result.total_payment:,.2f} RUB")
+            self.interest_label.config(text=f"Начисленные проценты: {result.total_interest:,.2f} RUB")
+            self.result_label.config(
+                text=f"Ежемесячный платеж: {converted:,.2f} {currency}" if converted is not None else ""
+            )
+
+        center = (result.amount, result.months, result.annual_rate, result.kind)
+        if center != self.sensitivity_center:
+            self.sensitivity_center = center
+            self.show_sensitivity(timer)
+
+    def show_sensitivity(self, timer: Optional[ActionTimer] = None):
+        """
+        Заполняет таблицу "что если" вокруг последних рассчитанных параметров.
+
+        Строки - процентные ставки, столбцы - сроки кредита. Для
+        дифференцированных платежей показывается первый платеж. Уже
+        рассчитанные ячейки берутся из кэша, новые считаются одной
+        векторной операцией.
+
+        Args:
+            timer: Таймер действия, в который добавляется время (опционально)
+        """
+        if self.sensitivity_center is None:
+            return
+
+        from loan import SensitivityGrid, grid_axes
+
+        if self.sensitivity is None:
+            self.sensitivity = SensitivityGrid()
+        timer = timer or ActionTimer("Таблица \"что если\"")
+        loan_amount, loan_months, annual_rate, kind = self.sensitivity_center
+        with timer.measure(CALC):
+            rates, terms = grid_axes(annual_rate, loan_months)
+            payments, interest = self.sensitivity.compute(loan_amount, rates, terms, kind)
+            values = payments if self.sensitivity_metric_var.get() == SENSITIVITY_METRICS[0] else interest
+
+        with timer.measure(UI):
+            self._fill_sensitivity_tree(rates, terms, values, annual_rate)
+
+    def _fill_sensitivity_tree(self, rates, terms, values, annual_rate: float):
+        """
+        Выводит рассчитанную сетку в таблицу "что если".
+
+        Args:
+            rates: Ставки (строки таблицы)
+            terms: Сроки (столбцы таблицы)
+            values: Значения ячеек формы (ставки, сроки)
+            annual_rate: Центральная ставка для подсветки строки
+        """
+        columns = ["rate"] + [str(term) for term in terms]
+        tree = self.sensitivity_tree
+        tree.delete(*tree.get_children())
+        tree["columns"] = columns
+        tree.heading("rate", text="Ставка \\ срок")
+        tree.column("rate", width=90, anchor="w")
+        for term in terms:
+            tree.heading(str(term), text=f"{term} мес.")
+            tree.column(str(term), width=80, anchor="e")
+
+        for rate, row in zip(rates, values.tolist()):
+            tags = ("center",) if rate == round(annual_rate, 4) else ()
+            tree.insert("", tk.END, values=[f"{rate:g}%"] + [f"{value:,.0f}" for value in row], tags=tags)
+
+    def show_schedule(self):
+        """
+        Показывает помесячный график погашения кредита в отдельном окне.
+
+        Для каждого месяца выводятся платеж, погашение основного долга,
+        проценты и остаток долга.
+        """
+        timer = ActionTimer("График платежей")
+        try:
+            loan_amount = self.loan_var.get()
+            loan_months = self.loan_time_var.get()
+            annual_rate = self.annual_interest_var.get()
+
+            if (self.is_loan_invalid(loan_amount, "Сумма кредита") or
+                    self.is_loan_invalid(loan_months, "Срок кредита") or
+                    self.is_loan_invalid(annual_rate, "Процентная ставка")):
+                return
+
+            from loan import build_schedule
+
+            kind = PAYMENT_KINDS[self.payment_kind_var.get()]
+            with timer.measure(CALC):
+                schedule = build_schedule(loan_amount, loan_months, annual_rate, kind)
+        except Exception as e:
+            self.log(f"Ошибка при построении графика платежей: {e}")
+            return
+
+        with timer.measure(UI):
+            self._show_schedule_window(schedule)
+
+        self.log(f"Построен график платежей на {len(schedule)} мес.")
+        self.log(timer.report())
+
+    def _show_schedule_window(self, schedule):
+        """
+        Открывает окно с таблицей графика платежей.
+
+        Args:
+            schedule: График погашения (LoanSchedule)
+        """
+        window = tk.Toplevel(self)
+        window.title(f"График платежей ({self.payment_kind_var.get().lower()})")
+        window.geometry("600x400")
+
+        columns = ("month", "payment", "principal", "interest", "balance")
+        headings = ("Месяц", "Платеж", "Основной долг", "Проценты", "Остаток")
+        tree = ttk.Treeview(window, columns=columns, show="headings")
+        for column, heading in zip(columns, headings):
+            tree.heading(column, text=heading)
+            tree.column(column, width=60 if column == "month" else 120, anchor="e")
+
+        rows = zip(schedule.month.tolist(), schedule.payment.tolist(), schedule.principal.tolist(),
+                   schedule.interest.tolist(), schedule.balance.tolist())
+        for month, payment, principal, interest, balance in rows:
+            tree.insert("", tk.END, values=(month, f"{payment:,.2f}", f"{principal:,.2f}",
+                                            f"{interest:,.2f}", f"{balance:,.2f}"))
+
+        ttk.Label(window, text=f"Итого: {schedule.total_payment:,.2f} RUB, "
+                               f"проценты: {schedule.total_interest:,.2f} RUB").pack(side="bottom", pady=5)
+
+        scrollbar = ttk.Scrollbar(window, orient="vertical", command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        tree.pack(side="left", fill=tk.BOTH, expand=True)
+        scrollbar.pack(side="right", fill=tk.Y)
+
     def convert(self):
         """
         Конвертирует сумму ежемесячного платежа в выбранную валюту.
 
         Этапы конвертации:
         1. Проверка выполнения расчета кредита
-        2. Получение актуального курса валюты из БД
-        3. Выполнение конвертации RUB → целевая валюта
+        2. Получение кросс-курса из таблицы, загруженной из БД
+        3. Выполнение конвертации RUB → целевая валюта с учетом номинала
         4. Обновление интерфейса с результатом
         """
         target_currency = self.target_var.get().upper()  # Выносим для использования в except
+        timer = ActionTimer("Конвертировать")
 
         try:
             # Проверяем, выполнен ли расчёт кредита
-            monthly_text = self.monthly_label.cget("text")
-            try:
-                monthly_value_str = monthly_text.split(": ")[1].replace(" RUB", "").replace(",", "")
-                monthly_value = float(monthly_value_str)
-            except (IndexError, ValueError):
+            if self.loan_result is None:
                 self.log("Ошибка: Сначала выполните расчёт кредита")
                 return
 
-            if monthly_value <= 0:
-                self.log("Ошибка: Сначала выполните расчёт кредита")
+            if self.get_conversion() is None:
+                self.log("Ошибка: Курсы валют ещё не загружены")
                 return
 
-            # Получаем курс из базы данных
-            rate = get_saved_rate(target_currency)
-
-            # Конвертация RUB → выбранная валюта
-            converted_amount = monthly_value / rate
+            # Конвертация RUB → выбранная валюта (из кэша, если уже считалась)
+            loan = self.loan_result
+            key = (loan.amount, loan.months, loan.annual_rate, loan.kind, target_currency)
+            with timer.measure(CALC):
+                result, converted_amount = self.compute_results(key)
+            if converted_amount is None:
+                raise ValueError(f"Курс для валюты {target_currency} не найден в базе данных")
 
             # Обновляем интерфейс
-            self.result_label.config(
-                text=f"Ежемесячный платеж: {converted_amount:,.2f} {target_currency}"
-            )
-            self.log(f"Конвертация: {monthly_value:,.2f} RUB → {converted_amount:,.2f} {target_currency}")
+            self.show_results(key, result, converted_amount, timer)
+            self.log(f"Конвертация: {result.monthly_payment:,.2f} RUB → "
+                     f"{converted_amount:,.2f} {target_currency}")
+            self.log(timer.report())
 
         except ValueError as e:
-            # Обрабатываем только ошибку отсутствия курса из get_saved_rate()
+            # Обрабатываем только ошибку отсутствия курса в таблице
             self.log(f"Ошибка: {e}")
         except Exception as e:
             # Остальные непредвиденные ошибки
             self.log(f"Ошибка при конвертации {target_currency}: {e}")
 
+    def convert_all(self):
+        """
+        Показывает ежемесячный платеж во всех валютах в отдельном окне.
+
+        Конвертация во все валюты выполняется одной векторной операцией
+        по таблице кросс-курсов.
+        """
+        if self.loan_result is None:
+            self.log("Ошибка: Сначала выполните расчёт кредита")
+            return
+        if self.get_conversion() is None:
+            self.log("Ошибка: Курсы валют ещё не загружены")
+            return
+
+        monthly_value = self.loan_result.monthly_payment
+        timer = ActionTimer("Во все валюты")
+        with timer.measure(CALC):
+            converted = self.conversion.convert_all(monthly_value)
+
+        with timer.measure(UI):
+            self._show_converted_window(converted)
+
+        self.log(f"Конвертация {monthly_value:,.2f} RUB во все валюты ({len(converted) - 1})")
+        self.log(timer.report())
+
+    def _show_converted_window(self, converted):
+        """
+        Открывает окно с платежом во всех валютах.
+
+        Args:
+            converted: Код валюты -> сумма платежа в этой валюте
+        """
+        window = tk.Toplevel(self)
+        window.title("Ежемесячный платеж во всех валютах")
+        window.geometry("400x400")
+
+        columns = ("currency", "rate", "amount")
+        tree = ttk.Treeview(window, columns=columns, show="headings")
+        tree.heading("currency", text="Валюта")
+        tree.heading("rate", text="Курс, RUB за 1")
+        tree.heading("amount", text="Ежемесячный платеж")
+        tree.column("currency", width=80, anchor="w")
+        tree.column("rate", width=120, anchor="e")
+        tree.column("amount", width=160, anchor="e")
+
+        rub_per_unit = self.conversion.rub_per_unit.tolist()
+        for code, rate in zip(self.conversion.codes, rub_per_unit):
+            if code != self.base_var.get():
+                tree.insert("", tk.END, values=(code, f"{rate:,.4f}", f"{converted[code]:,.2f}"))
+
+        scrollbar = ttk.Scrollbar(window, orient="vertical", command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        tree.pack(side="left", fill=tk.BOTH, expand=True)
+        scrollbar.pack(side="right", fill=tk.Y)
+
     def update_db(self):
         """
         Обновляет курсы валют в базе данных.
 
-        Выполняет:
+        Запускает фоновое обновление, которое выполняет:
         - запрос актуальных курсов через API ЦБ РФ
         - сохранение курсов в локальную БД
         - обновление списка доступных валют в интерфейсе
         """
+        self.log("Обновление курсов валют...")
+        self.start_refresh(force=True)
+
+    def start_refresh(self, force: bool):
+        """
+        Запускает загрузку курсов в фоновом потоке.
+
+        Повторный запуск во время выполняющегося обновления игнорируется,
+        в том числе пока отменённое обновление не завершило работу.
+
+        Args:
+            force: Проверить курсы на сервере, не доверяя кэшу ответа
+                   (обновление по кнопке); иначе - загрузка при запуске
+        """
+        if self.refresh_cancel is not None:
+            self.log("Обновление курсов уже выполняется")
+            return
+
+        cancel = threading.Event()
+        self.refresh_cancel = cancel
+        self.update_button.config(state="disabled")
+        self.cancel_button.config(state="normal")
+        self.progress.start(10)
+
+        timer = ActionTimer("Обновление курсов" if force else "Загрузка курсов")
+        worker = threading.Thread(target=self._refresh_worker, args=(cancel, force, timer), daemon=True)
+        worker.start()
+        if not self.refresh_polling:
+            self.refresh_polling = True
+            self.after(REFRESH_POLL_MS, self._poll_refresh)
+
+    def cancel_refresh(self):
+        """
+        Отменяет текущее обновление курсов.
+
+        Запрос к API нельзя прервать, поэтому его результат просто
+        отбрасывается, а запись в БД не выполняется. Кнопка обновления
+        остаётся недоступной, пока отменённый поток не завершится, чтобы
+        два обновления не выполнялись одновременно.
+        """
+        if self.refresh_cancel is None or self.refresh_cancel.is_set():
+            return
+        self.refresh_cancel.set()
+        self.progress.stop()
+        self.cancel_button.config(state="disabled")
+        self.log("Обновление курсов отменено")
+
+        # Отменена загрузка списка валют при запуске - список не должен остаться пустым
+        if not self.target_combobox['values']:
+            self.use_default_currencies(RuntimeError("загрузка курсов отменена"))
+
+    def _refresh_worker(self, cancel: threading.Event, force: bool, timer: 'ActionTimer'):
+        """
+        Выполняется в фоновом потоке: загружает курсы и сохраняет их в БД.
+
+        С виджетами не работает - результат кладётся в очередь.
+
+        Args:
+            cancel: Событие отмены этого обновления
+            force: Проверить курсы на сервере, не доверяя кэшу ответа
+            timer: Таймер действия для замера сети, БД и расчёта
+        """
         try:
-            self.log("Обновление курсов валют...")
-            data = fetch_rates()
-            valute = data.get('Valute', {})
+            with timer.measure(NETWORK):
+                data = fetch_rates(force=force)
+            # Курсы сохраняются и при первой загрузке, чтобы следующий
+            # запуск работал из локальной БД без сети
+            if not cancel.is_set():
+                with timer.measure(DB):
+                    save_rates_bulk(data.get('Valute', {}), data.get('Date'))
+                    compact_history()
+            with timer.measure(CALC):
+                from converter import ConversionTable
+                table = ConversionTable.from_valute(data.get('Valute', {}))
+            self.refresh_queue.put((cancel, force, timer, (data, table), None))
+        except Exception as e:
+            self.refresh_queue.put((cancel, force, timer, None, e))
+
+    def _poll_refresh(self):
+        """
+        Забирает результаты фонового обновления в главном потоке.
+
+        Результат отменённого обновления отбрасывается; он только
+        разблокирует кнопку обновления.
+        """
+        while True:
+            try:
+                cancel, force, timer, result, error = self.refresh_queue.get_nowait()
+            except queue.Empty:
+                break
+            if cancel is not self.refresh_cancel:
+                continue
+            self._finish_refresh()
+            if not cancel.is_set():
+                with timer.measure(UI):
+                    self._apply_refresh(force, result, error)
+                self.log(timer.report())
+
+        if self.refresh_cancel is not None:
+            self.after(REFRESH_POLL_MS, self._poll_refresh)
+        else:
+            self.refresh_polling = False
+
+    def _finish_refresh(self):
+        """Возвращает элементы управления в исходное состояние после обновления."""
+        self.refresh_cancel = None
+        self.progress.stop()
+        self.update_button.config(state="normal")
+        self.cancel_button.config(state="disabled")
+
+    def _apply_refresh(self, force: bool, result, error: Optional[Exception]):
+        """
+        Отображает результат фонового обновления в интерфейсе.
+
+        Args:
+            force: Было ли это обновлением курсов по кнопке
+            result: Данные о курсах валют и таблица кросс-курсов (None при ошибке)
+            error: Ошибка загрузки (None при успехе)
+        """
+        if error is not None:
+            if force:
+                self.log(f"Ошибка при обновлении курсов: {error}")
+            if not self.target_combobox['values']:
+                self.use_default_currencies(error)
+            return
+
+        data, table = result
+        self.set_conversion(table)
+        self.load_currencies(data)
+        if force:
+            self.log(f"Курсы валют успешно обновлены ({len(data.get('Valute', {}))} валют)")
+
+    def set_conversion(self, table: 'ConversionTable'):
+        """
+        Устанавливает новую таблицу кросс-курсов.
+
+        Запомненные результаты конвертации сбрасываются и пересчитываются
+        по новым курсам.
+
+        Args:
+            table: Таблица кросс-курсов
+        """
+        self.conversion = table
+        self.result_cache.clear()
+        self.shown_key = None
+        self.schedule_recalculation()
 
-            for code, info in valute.items():
-                rate = info.get('Value')
-                if rate:
-                    save_rate(code, rate)
+    def get_conversion(self) -> Optional['ConversionTable']:
+        """
+        Возвращает таблицу кросс-курсов, при первом обращении строя её из БД.
 
-            self.load_currencies(data)
-            self.log(f"Курсы валют успешно обновлены ({len(valute)} валют)")
+        Returns:
+            Optional[ConversionTable]: Таблица или None, если курсов ещё нет
+        """
+        if self.conversion is None and self.target_combobox['values']:
+            from converter import ConversionTable
+            table = ConversionTable()
+            if len(table) > 1:
+                self.conversion = table
+        return self.conversion
+
+    def load_saved_currencies(self):
+        """
+        Загружает список валют из локальной БД без обращения к сети.
 
+        Таблица кросс-курсов строится позже, при первой конвертации.
+        Если в БД ещё нет курсов, запускается фоновая загрузка через API
+        с сохранением курсов в БД.
+        """
+        try:
+            currencies = [code for code in get_saved_currencies() if code != self.base_var.get()]
         except Exception as e:
-            self.log(f"Ошибка при обновлении курсов: {e}")
+            self.log(f"Ошибка чтения валют из БД: {e}")
+            currencies = []
+
+        if currencies:
+            self.target_combobox['values'] = currencies
+            self.log(f"Загружено {len(currencies)} валют из локальной БД")
+        else:
+            self.load_currencies()
 
     def load_currencies(self, data=None):
         """
@@ -277,18 +836,29 @@ class CurrencyConverterApp(tk.Tk):
 
         Args:
             data: Готовые данные о валютах (опционально)
-                  Если не переданы - выполняется API-запрос
+                  Если не переданы - запускается фоновый API-запрос
         """
+        if not data:
+            self.start_refresh(force=False)
+            return
+
         try:
-            if not data:
-                data = fetch_rates()
             currencies = list(data.get('Valute', {}).keys())
             self.target_combobox['values'] = currencies
             self.log(f"Загружено {len(currencies)} валют")
         except Exception as e:
-            default_currencies = ['USD', 'EUR', 'GBP', 'JPY', 'CNY']
-            self.target_combobox['values'] = default_currencies
-            self.log(f"Использован резервный список валют. Ошибка: {e}")
+            self.use_default_currencies(e)
+
+    def use_default_currencies(self, error: Exception):
+        """
+        Заполняет выпадающий список резервным набором валют.
+
+        Args:
+            error: Ошибка, из-за которой не удалось получить список валют
+        """
+        default_currencies = ['USD', 'EUR', 'GBP', 'JPY', 'CNY']
+        self.target_combobox['values'] = default_currencies
+        self.log(f"Использован резервный список валют. Ошибка: {error}")
 
 
 def main():
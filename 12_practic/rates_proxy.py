@@ -0,0 +1,249 @@
+"""
+Локальный прокси курсов валют для многих клиентов.
+
+Загружает курсы ЦБ РФ через api.fetch_rates, хранит ответ в памяти и в БД
+и раздаёт его по HTTP. Одновременные запросы клиентов при устаревшем ответе
+объединяются в один запрос к ЦБ РФ. Если ответ в памяти уже есть, клиенты
+получают его сразу, а обновление выполняется в фоне; после неудачного
+обновления новая попытка делается не раньше чем через FAILURE_BACKOFF секунд.
+Клиенты получают ETag и Cache-Control, поэтому повторные запросы обычно
+заканчиваются ответом 304.
+
+Запуск:
+    python rates_proxy.py [--host 127.0.0.1] [--port 8765] [--ttl 300]
+
+Подключение приложения:
+    RATES_API_URL=http://127.0.0.1:8765/daily_json.js python main.py
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import time
+from typing import Dict, Optional, Tuple
+
+import api
+import db
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_TTL = 300
+
+# Пауза перед новым обращением к ЦБ РФ после неудачного обновления, секунд
+FAILURE_BACKOFF = 30
+
+RATES_PATHS = {'/', '/daily_json.js'}
+MAX_HEADER_LINES = 100
+
+
+class RatesProxy:
+    """
+    HTTP-сервер на asyncio, раздающий закэшированный ответ ЦБ РФ.
+    """
+
+    def __init__(self, ttl: int = DEFAULT_TTL, upstream: str = api.CBR_API_URL):
+        """
+        Инициализация прокси.
+
+        Args:
+            ttl: Сколько секунд ответ считается свежим
+            upstream: Адрес API ЦБ РФ
+        """
+        self.ttl = ttl
+        self.upstream = upstream
+        self.body: Optional[bytes] = None
+        self.etag: Optional[str] = None
+        self.rate_date: Optional[str] = None
+        self.fetched_at = 0.0
+        self.retry_at = 0.0
+        self.refresh_task: Optional[asyncio.Task] = None
+        self.upstream_requests = 0
+
+    def is_fresh(self) -> bool:
+        """Проверяет, можно ли отдать ответ из памяти без обращения к ЦБ РФ."""
+        return self.body is not None and time.monotonic() - self.fetched_at < self.ttl
+
+    def _fetch(self) -> Dict:
+        """
+        Загружает курсы и сохраняет их в БД (выполняется в отдельном потоке).
+
+        Returns:
+            dict: Данные о курсах валют
+        """
+        # Адрес передаётся явно: сам прокси всегда ходит в ЦБ РФ,
+        # даже если RATES_API_URL в окружении указывает на прокси
+        data = api.fetch_rates(force=True, url=self.upstream)
+        rate_date = data.get('Date')
+        if rate_date and rate_date != self.rate_date:
+            db.save_rates_bulk(data.get('Valute', {}), rate_date)
+            db.compact_history()
+        return data
+
+    async def _refresh(self):
+        """Обновляет ответ в памяти из ЦБ РФ; при ошибке откладывает следующую попытку."""
+        self.upstream_requests += 1
+        try:
+            data = await asyncio.get_running_loop().run_in_executor(None, self._fetch)
+        except Exception:
+            self.retry_at = time.monotonic() + FAILURE_BACKOFF
+            raise
+        self.retry_at = 0.0
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.body = body
+        self.etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        self.rate_date = data.get('Date')
+        self.fetched_at = time.monotonic()
+
+    async def get_rates(self) -> Tuple[bytes, str]:
+        """
+        Возвращает актуальный ответ, обновляя его при необходимости.
+
+        Устаревший ответ отдаётся сразу, а обновление запускается в фоне.
+        Ждут обновления только запросы, для которых ответа в памяти ещё нет;
+        все они ждут одну и ту же задачу. Пока действует пауза после
+        неудачного обновления, новые обращения к ЦБ РФ не выполняются.
+
+        Returns:
+            tuple: Тело ответа и его ETag
+
+        Raises:
+            Exception: Если ЦБ РФ недоступен и ответа в памяти нет
+        """
+        if not self.is_fresh() and time.monotonic() >= self.retry_at:
+            if self.refresh_task is None or self.refresh_task.done():
+                self.refresh_task = asyncio.ensure_future(self._refresh())
+                # Ошибку фонового обновления никто может не ждать
+                self.refresh_task.add_done_callback(lambda task: task.cancelled() or task.exception())
+        if self.body is None:
+            await asyncio.shield(self.refresh_task)
+        return self.body, self.etag
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Обрабатывает одно HTTP-соединение.
+
+        Args:
+            reader: Поток чтения запроса
+            writer: Поток записи ответа
+        """
+        try:
+            request_line = (await reader.readline()).decode('latin-1').strip()
+            headers = {}
+            for _ in range(MAX_HEADER_LINES):
+                line = (await reader.readline()).decode('latin-1').strip()
+                if not line:
+                    break
+                name, _, value = line.partition(':')
+                headers[name.strip().lower()] = value.strip()
+
+            parts = request_line.split()
+            if len(parts) < 2 or parts[0] not in ('GET', 'HEAD'):
+                await self._respond(writer, 405, b'Method Not Allowed', head=False)
+                return
+
+            method, path = parts[0], parts[1].split('?')[0]
+            if path == '/health':
+                await self._respond(writer, 200, b'ok', head=method == 'HEAD')
+                return
+            if path not in RATES_PATHS:
+                await self._respond(writer, 404, b'Not Found', head=method == 'HEAD')
+                return
+
+            try:
+                body, etag = await self.get_rates()
+            except Exception as e:
+                await self._respond(writer, 502, f"Upstream error: {e}".encode('utf-8'), head=method == 'HEAD')
+                return
+
+            max_age = max(0, int(self.ttl - (time.monotonic() - self.fetched_at)))
+            extra = {'ETag': etag, 'Cache-Control': f'max-age={max_age}'}
+            if headers.get('if-none-match') == etag:
+                await self._respond(writer, 304, b'', extra, head=True)
+            else:
+                await self._respond(writer, 200, body, extra, head=method == 'HEAD',
+                                    content_type='application/json; charset=utf-8')
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer: asyncio.StreamWriter, status: int, body: bytes,
+                       headers: Optional[Dict[str, str]] = None, head: bool = False,
+                       content_type: str = 'text/plain; charset=utf-8'):
+        """
+        Отправляет HTTP-ответ и закрывает соединение.
+
+        Args:
+            writer: Поток записи ответа
+            status: Код ответа
+            body: Тело ответа
+            headers: Дополнительные заголовки
+            head: Не отправлять тело (HEAD-запрос или 304)
+            content_type: Тип содержимого
+        """
+        reasons = {200: 'OK', 304: 'Not Modified', 404: 'Not Found',
+                   405: 'Method Not Allowed', 502: 'Bad Gateway'}
+        lines = [f"HTTP/1.1 {status} {reasons.get(status, '')}",
+                 f"Content-Type: {content_type}",
+                 f"Content-Length: {0 if status == 304 else len(body)}",
+                 "Connection: close"]
+        lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode('latin-1'))
+        if not head:
+            writer.write(body)
+        await writer.drain()
+
+    async def serve(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> asyncio.AbstractServer:
+        """
+        Запускает HTTP-сервер.
+
+        Args:
+            host: Адрес для прослушивания
+            port: Порт (0 - выбрать свободный)
+
+        Returns:
+            asyncio.AbstractServer: Запущенный сервер
+        """
+        return await asyncio.start_server(self.handle, host, port)
+
+
+async def run(host: str, port: int, ttl: int, upstream: str):
+    """
+    Запускает прокси и обслуживает клиентов до остановки процесса.
+
+    Args:
+        host: Адрес для прослушивания
+        port: Порт
+        ttl: Сколько секунд ответ считается свежим
+        upstream: Адрес API ЦБ РФ
+    """
+    proxy = RatesProxy(ttl, upstream)
+    server = await proxy.serve(host, port)
+    print(f"Прокси курсов запущен: http://{host}:{server.sockets[0].getsockname()[1]}/daily_json.js")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    """
+    Точка входа: разбирает аргументы командной строки и запускает прокси.
+    """
+    parser = argparse.ArgumentParser(description="Локальный прокси курсов валют ЦБ РФ")
+    parser.add_argument('--host', default=DEFAULT_HOST, help="адрес для прослушивания")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help="порт")
+    parser.add_argument('--ttl', type=int, default=DEFAULT_TTL, help="срок свежести ответа, секунд")
+    parser.add_argument('--upstream', default=api.CBR_API_URL, help="адрес API ЦБ РФ")
+    parser.add_argument('--db', help="путь к БД")
+    args = parser.parse_args()
+
+    if args.db:
+        db.DB_NAME = args.db
+
+    try:
+        asyncio.run(run(args.host, args.port, args.ttl, args.upstream))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Общие фикстуры тестов: временная БД, изолированный кэш API
+и локальный HTTP-сервер с заданными ответами.
+"""
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# Модули приложения импортируются по имени (import db), как в main.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import api  # noqa: E402
+import db  # noqa: E402
+
+
+class StubServer:
+    """
+    Локальный HTTP-сервер для тестов.
+
+    Ответ на каждый GET-запрос возвращает функция respond(path, headers)
+    в виде тройки (код ответа, заголовки, тело). Все запросы запоминаются.
+    """
+
+    def __init__(self, respond):
+        self.respond = respond
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.requests.append((self.path, dict(self.headers)))
+                status, headers, body = stub.respond(self.path, self.headers)
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        """Останавливает сервер: дальнейшие запросы получают отказ в соединении."""
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+@pytest.fixture
+def stub_server():
+    """Фабрика локальных HTTP-серверов; серверы останавливаются после теста."""
+    servers = []
+
+    def start(respond):
+        server = StubServer(respond)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.stop()
+
+
+@pytest.fixture
+def temp_db(tmp_path, monkeypatch):
+    """Временная БД вместо exchange_rates.db."""
+    monkeypatch.setattr(db, 'DB_NAME', str(tmp_path / 'rates.db'))
+    yield db
+    db.close_connection()
+
+
+@pytest.fixture
+def api_cache(tmp_path, monkeypatch):
+    """Изолированный кэш ответов API во временном каталоге."""
+    monkeypatch.setattr(api, 'CACHE_FILE', str(tmp_path / 'rates_cache.json'))
+    api.clear_cache()
+    yield api
+    api.clear_cache()
@@ -0,0 +1,117 @@
+"""
+Тесты кэширования ответов API ЦБ РФ на локальном HTTP-сервере.
+"""
+import json
+import time
+
+import pytest
+import requests
+
+ETAG = '"v1"'
+
+
+def make_payload(usd: float):
+    return {'Date': '2024-01-10T11:30:00+03:00',
+            'Valute': {'USD': {'CharCode': 'USD', 'Nominal': 1, 'Value': usd}}}
+
+
+class RatesStub:
+    """Ответы тестового сервера: тело с ETag, 304 на совпадающий If-None-Match."""
+
+    def __init__(self, payload, etag=ETAG, max_age=3600):
+        self.payload = payload
+        self.etag = etag
+        self.max_age = max_age
+
+    def __call__(self, path, headers):
+        cache_headers = {'ETag': self.etag, 'Cache-Control': f'max-age={self.max_age}'}
+        if headers.get('If-None-Match') == self.etag:
+            return 304, cache_headers, b''
+        body = json.dumps(self.payload).encode('utf-8')
+        return 200, dict(cache_headers, **{'Content-Type': 'application/json'}), body
+
+
+@pytest.fixture
+def rates_server(stub_server, api_cache, monkeypatch):
+    """Сервер курсов, на который указывает api.API_URL."""
+    stub = RatesStub(make_payload(90.0))
+    server = stub_server(stub)
+    monkeypatch.setattr(api_cache, 'API_URL', f"{server.url}/daily_json.js")
+    server.stub = stub
+    return server
+
+
+def expire(api, seconds):
+    """Состаривает запись кэша в памяти на заданное число секунд сверх срока свежести."""
+    entry = api._load_cache()
+    entry['stored_at'] = time.time() - entry['max_age'] - seconds
+
+
+def wait_revalidation(api, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while api._revalidating and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not api._revalidating
+
+
+def test_fresh_response_is_served_from_cache(rates_server, api_cache):
+    first = api_cache.fetch_rates()
+    second = api_cache.fetch_rates()
+
+    assert first == second == make_payload(90.0)
+    assert len(rates_server.requests) == 1
+
+
+def test_cache_survives_restart_on_disk(rates_server, api_cache):
+    api_cache.fetch_rates()
+    api_cache._cache_entry = None
+
+    assert api_cache.fetch_rates() == make_payload(90.0)
+    assert len(rates_server.requests) == 1
+
+
+def test_force_sends_conditional_request_and_accepts_304(rates_server, api_cache):
+    api_cache.fetch_rates()
+    stored_at = api_cache._load_cache()['stored_at']
+
+    assert api_cache.fetch_rates(force=True) == make_payload(90.0)
+    assert len(rates_server.requests) == 2
+    assert rates_server.requests[1][1].get('If-None-Match') == ETAG
+    assert api_cache._load_cache()['stored_at'] >= stored_at
+
+
+def test_stale_response_is_returned_and_revalidated_in_background(rates_server, api_cache):
+    api_cache.fetch_rates()
+    rates_server.stub.payload = make_payload(95.0)
+    rates_server.stub.etag = '"v2"'
+    expire(api_cache, 10)
+
+    assert api_cache.fetch_rates() == make_payload(90.0)
+    wait_revalidation(api_cache)
+
+    assert len(rates_server.requests) == 2
+    assert api_cache.fetch_rates() == make_payload(95.0)
+
+
+def test_expired_cache_is_used_when_network_is_down(rates_server, api_cache):
+    api_cache.fetch_rates()
+    expire(api_cache, api_cache.STALE_TTL + 10)
+    rates_server.stop()
+
+    assert api_cache.fetch_rates() == make_payload(90.0)
+
+
+def test_force_raises_when_network_is_down(rates_server, api_cache):
+    api_cache.fetch_rates()
+    rates_server.stop()
+
+    with pytest.raises(requests.RequestException):
+        api_cache.fetch_rates(force=True)
+
+
+def test_error_without_cache_raises(stub_server, api_cache, monkeypatch):
+    server = stub_server(lambda path, headers: (503, {}, b'unavailable'))
+    monkeypatch.setattr(api_cache, 'API_URL', f"{server.url}/daily_json.js")
+
+    with pytest.raises(requests.RequestException):
+        api_cache.fetch_rates()
@@ -0,0 +1,96 @@
+"""
+Тесты загрузки истории курсов на локальном архиве с выходными и сбоями.
+"""
+import json
+from datetime import date, timedelta
+
+import pytest
+
+import backfill
+
+START = date(2024, 1, 1)
+END = date(2024, 1, 14)
+TODAY = date(2024, 6, 1)
+
+
+class ArchiveStub:
+    """Архив ЦБ РФ: 404 для выходных, 503 на первый запрос за даты из flaky."""
+
+    def __init__(self, flaky=()):
+        self.flaky = set(flaky)
+
+    def __call__(self, path, headers):
+        year, month, day = (int(part) for part in path.split('/')[2:5])
+        current = date(year, month, day)
+        if current.weekday() >= 5:
+            return 404, {}, b'not found'
+        if current in self.flaky:
+            self.flaky.discard(current)
+            return 503, {}, b'unavailable'
+        payload = {'Date': f'{current.isoformat()}T11:30:00+03:00',
+                   'Valute': {'USD': {'CharCode': 'USD', 'Nominal': 1, 'Value': 90.0 + current.day}}}
+        return 200, {'Content-Type': 'application/json'}, json.dumps(payload).encode('utf-8')
+
+
+@pytest.fixture
+def archive(stub_server, temp_db, monkeypatch):
+    """Архив со сбоями на 3 и 10 января; повторы выполняются без пауз."""
+    monkeypatch.setattr(backfill, 'RETRY_BACKOFF', 0)
+    server = stub_server(ArchiveStub(flaky=[date(2024, 1, 3), date(2024, 1, 10)]))
+    server.template = server.url + '/archive/{year:04d}/{month:02d}/{day:02d}/daily_json.js'
+    return server
+
+
+def run(archive, start=START, end=END):
+    return backfill.backfill(start, end, workers=4, rate=0, retries=2,
+                             url_template=archive.template, today=TODAY)
+
+
+def test_weekends_are_gaps_and_failures_are_retried(archive, temp_db):
+    stats = run(archive)
+
+    assert stats == {'loaded': 10, 'gaps': 4, 'failed': 0, 'skipped': 0}
+    assert len(archive.requests) == 14 + 2
+    assert temp_db.get_rate_range('USD', '2024-01-03', '2024-01-03') == [('2024-01-03', 93.0)]
+    assert temp_db.get_history_dates(START.isoformat(), END.isoformat()) == {
+        (START + timedelta(days=i)).isoformat() for i in range(14)}
+
+
+def test_rerun_skips_stored_dates(archive):
+    run(archive)
+    archive.requests.clear()
+
+    assert run(archive) == {'loaded': 0, 'gaps': 0, 'failed': 0, 'skipped': 14}
+    assert archive.requests == []
+
+
+def test_rerun_resumes_interrupted_period(archive):
+    run(archive, end=date(2024, 1, 7))
+    archive.requests.clear()
+
+    stats = run(archive)
+
+    assert stats['skipped'] == 7 and stats['loaded'] == 5
+    assert sorted(path.split('/')[4] for path, _ in archive.requests) == ['08', '09', '10', '10', '11', '12', '13', '14']
+
+
+def test_rerun_after_compaction_does_not_refetch(archive, temp_db):
+    run(archive)
+    assert temp_db.compact_history(today='2024-01-20', daily_days=7) > 0
+    archive.requests.clear()
+
+    assert run(archive) == {'loaded': 0, 'gaps': 0, 'failed': 0, 'skipped': 14}
+    assert archive.requests == []
+
+
+def test_compaction_does_not_hide_dates_that_were_never_loaded(archive, temp_db):
+    run(archive, end=date(2024, 1, 7))
+    temp_db.save_history_bulk([('2024-03-04', {'USD': {'Value': 95.0, 'Nominal': 1}})])
+    temp_db.compact_history(today='2024-04-01', daily_days=7)
+    archive.requests.clear()
+
+    stats = run(archive, end=date(2024, 2, 29))
+
+    assert stats['skipped'] == 7
+    assert stats['loaded'] + stats['gaps'] == 60 - 7
+    assert not any(path.split('/')[3:5] == ['01', '05'] for path, _ in archive.requests)
@@ -0,0 +1,74 @@
+"""
+Тесты пакетного расчёта портфеля: потоковая обработка CSV и конвертация.
+"""
+import csv
+import io
+
+import pytest
+
+import batch
+from loan import annuity_payment
+
+
+def run(text, rates=None, chunk_size=batch.DEFAULT_CHUNK_SIZE, workers=1):
+    output = io.StringIO()
+    stats = batch.run(io.StringIO(text), output, rates, workers, chunk_size)
+    return stats, list(csv.DictReader(io.StringIO(output.getvalue())))
+
+
+def test_reordered_columns_and_invalid_rows():
+    text = ('currency,rate,term,amount\n'
+            'usd,12,24,100000\n'
+            'RUB,abc,12,50000\n'
+            'RUB,10,12.5,50000\n'
+            'RUB,-1,12,50000\n'
+            'EUR,0,12,1200\n')
+
+    (processed, skipped, unknown), rows = run(text)
+
+    assert (processed, skipped, unknown) == (2, 3, {})
+    assert [row['currency'] for row in rows] == ['USD', 'EUR']
+    assert list(rows[0]) == batch.OUTPUT_COLUMNS
+    assert float(rows[0]['monthly_payment']) == pytest.approx(float(annuity_payment(100000, 24, 12)), abs=0.005)
+    assert rows[1]['monthly_payment'] == '100.00'
+    assert rows[1]['total_interest'] == '0.00'
+
+
+def test_conversion_keeps_rub_and_reports_unknown_currencies():
+    text = ('amount,term,rate,currency\n'
+            '120000,12,0,RUB\n'
+            '120000,12,0,USD\n'
+            '120000,12,0,XXX\n'
+            '120000,12,0,\n'
+            '120000,12,0,XXX\n')
+
+    (processed, skipped, unknown), rows = run(text, rates={'USD': 100.0})
+
+    assert (processed, skipped) == (5, 0)
+    assert unknown == {'XXX': 2, '': 1}
+    assert list(rows[0]) == batch.OUTPUT_COLUMNS + batch.CONVERTED_COLUMNS
+    assert rows[0]['monthly_payment_converted'] == '10000.00'
+    assert rows[1]['monthly_payment_converted'] == '100.00'
+    assert rows[1]['total_payment_converted'] == '1200.00'
+    assert [row['monthly_payment_converted'] for row in rows[2:]] == ['', '', '']
+    assert all(row['monthly_payment'] == '10000.00' for row in rows)
+
+
+def test_order_is_preserved_across_chunks():
+    amounts = [1000 * (i + 1) for i in range(11)]
+    text = 'amount,term,rate,currency\n' + ''.join(f'{amount},10,0,RUB\n' for amount in amounts)
+
+    (processed, skipped, _), rows = run(text, chunk_size=2, workers=2)
+
+    assert (processed, skipped) == (11, 0)
+    assert [int(row['amount']) for row in rows] == amounts
+    assert [row['monthly_payment'] for row in rows] == [f'{amount / 10:.2f}' for amount in amounts]
+
+
+def test_missing_columns_raise():
+    with pytest.raises(ValueError):
+        run('amount,term,currency\n1000,12,RUB\n')
+
+
+def test_empty_input():
+    assert run('') == ((0, 0, {}), [])
@@ -0,0 +1,66 @@
+"""
+Тесты таблицы кросс-курсов: номиналы ЦБ РФ и конвертация во все валюты.
+"""
+import numpy as np
+import pytest
+
+from converter import BASE_CURRENCY, ConversionTable
+from loan import build_schedule
+
+VALUTE = {'JPY': {'CharCode': 'JPY', 'Nominal': 100, 'Value': 60.0},
+          'USD': {'CharCode': 'USD', 'Nominal': 1, 'Value': 90.0}}
+
+
+@pytest.fixture
+def table():
+    return ConversionTable.from_valute(VALUTE)
+
+
+def test_codes_start_with_base_currency(table):
+    assert table.codes == [BASE_CURRENCY, 'JPY', 'USD']
+    assert 'JPY' in table and 'EUR' not in table
+    np.testing.assert_allclose(table.rub_per_unit, [1.0, 0.6, 90.0])
+
+
+def test_convert_divides_by_nominal(table):
+    assert table.convert(6000, 'JPY') == pytest.approx(10000)
+    assert table.convert(9000, 'USD') == pytest.approx(100)
+    assert table.convert(500, BASE_CURRENCY) == pytest.approx(500)
+
+
+def test_convert_from_non_rub_source(table):
+    assert table.convert(1, 'JPY', source='USD') == pytest.approx(150)
+    assert table.convert(150, 'USD', source='JPY') == pytest.approx(1)
+    assert table.convert(10000, BASE_CURRENCY, source='JPY') == pytest.approx(6000)
+
+
+def test_convert_all_matches_convert(table):
+    result = table.convert_all(18000, source='USD')
+
+    assert list(result) == table.codes
+    for code, value in result.items():
+        assert value == pytest.approx(table.convert(18000, code, source='USD'))
+    assert result == pytest.approx({'RUB': 1_620_000, 'JPY': 2_700_000, 'USD': 18000})
+
+
+def test_convert_array_converts_schedule_into_every_currency(table):
+    schedule = build_schedule(1_000_000, 24, 12.0)
+    converted = table.convert_array(schedule.payment)
+
+    assert converted.shape == (len(table.codes), 24)
+    for i, code in enumerate(table.codes):
+        for month in (0, 11, 23):
+            assert converted[i, month] == pytest.approx(table.convert(schedule.payment[month], code))
+
+
+def test_unknown_currency_raises(table):
+    with pytest.raises(ValueError):
+        table.convert(100, 'EUR')
+    with pytest.raises(ValueError):
+        table.convert_all(100, source='EUR')
+
+
+def test_table_from_db_uses_nominals(temp_db):
+    temp_db.save_rates_bulk(VALUTE)
+
+    assert ConversionTable().convert(6000, 'JPY') == pytest.approx(10000)
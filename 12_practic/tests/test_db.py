@@ -0,0 +1,134 @@
+"""
+Тесты локальной БД курсов валют.
+"""
+import sqlite3
+
+import pytest
+
+
+def create_old_schema(path):
+    """БД в формате до появления столбца nominal: курс JPY записан за 100 единиц."""
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE rates (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            currency TEXT UNIQUE NOT NULL,
+            rate REAL NOT NULL,
+            fetched_at TEXT NOT NULL
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE rate_history (
+            currency TEXT NOT NULL,
+            rate_date TEXT NOT NULL,
+            rate REAL NOT NULL,
+            nominal INTEGER NOT NULL DEFAULT 1,
+            PRIMARY KEY (currency, rate_date)
+        ) WITHOUT ROWID
+    """)
+    conn.executemany("INSERT INTO rates (currency, rate, fetched_at) VALUES (?, ?, ?)",
+                     [('JPY', 60.0, '2024-01-10'), ('USD', 90.0, '2024-01-10'), ('HUF', 25.0, '2024-01-10')])
+    conn.executemany("INSERT INTO rate_history VALUES (?, ?, ?, ?)",
+                     [('JPY', '2024-01-10', 60.0, 100), ('USD', '2024-01-10', 90.0, 1)])
+    conn.commit()
+    conn.close()
+
+
+def test_nominal_migration_restores_nominals_from_history(temp_db):
+    create_old_schema(temp_db.DB_NAME)
+
+    assert temp_db.get_rate_table() == [('JPY', 60.0, 100), ('USD', 90.0, 1)]
+    assert temp_db.get_saved_rate('JPY') == 0.6
+
+
+def test_nominal_migration_drops_rates_without_history(temp_db):
+    create_old_schema(temp_db.DB_NAME)
+
+    assert 'HUF' not in temp_db.get_saved_currencies()
+
+
+def test_rates_are_returned_per_unit(temp_db):
+    temp_db.save_rates_bulk({'JPY': {'Value': 60.0, 'Nominal': 100}, 'USD': {'Value': 90.0, 'Nominal': 1}})
+
+    assert temp_db.get_saved_rates() == {'JPY': 0.6, 'USD': 90.0}
+
+
+def test_repeated_compaction_does_not_modify_db(temp_db):
+    temp_db.save_history_bulk([('2024-01-09', {'USD': {'Value': 89.0, 'Nominal': 1}}),
+                               ('2024-01-10', {'USD': {'Value': 90.0, 'Nominal': 1}})], ['2024-01-06'])
+    assert temp_db.compact_history(today='2024-06-01', daily_days=30) == 1
+
+    changes = temp_db.get_connection().total_changes
+    assert temp_db.compact_history(today='2024-06-01', daily_days=30) == 0
+    assert temp_db.get_connection().total_changes == changes
+    assert temp_db.get_history_dates('2024-01-01', '2024-01-31') == {'2024-01-06', '2024-01-09', '2024-01-10'}
+
+
+def usd(value):
+    return {'USD': {'Value': value, 'Nominal': 1}}
+
+
+def save_days(db, days):
+    """Сохраняет курсы USD за даты: значение курса равно дню месяца."""
+    db.save_history_bulk([(day, usd(float(day[-2:]))) for day in days])
+
+
+def test_rate_as_of_weekend_uses_previous_working_day(temp_db):
+    save_days(temp_db, ['2024-01-11', '2024-01-12', '2024-01-15'])
+
+    assert temp_db.get_rate_as_of('USD', '2024-01-13') == 12.0
+    assert temp_db.get_rate_as_of('USD', '2024-01-14') == 12.0
+    assert temp_db.get_rate_as_of('USD', '2024-01-15') == 15.0
+    with pytest.raises(ValueError):
+        temp_db.get_rate_as_of('USD', '2024-01-10')
+    with pytest.raises(ValueError):
+        temp_db.get_rate_as_of('EUR', '2024-01-15')
+
+
+def test_rate_range_includes_bounds(temp_db):
+    save_days(temp_db, ['2024-01-10', '2024-01-11', '2024-01-12', '2024-01-15'])
+
+    assert temp_db.get_rate_range('USD', '2024-01-11', '2024-01-15') == [
+        ('2024-01-11', 11.0), ('2024-01-12', 12.0), ('2024-01-15', 15.0)]
+    assert temp_db.get_rate_range('USD', '2024-01-13', '2024-01-14') == []
+
+
+def test_latest_rates_per_currency(temp_db):
+    temp_db.save_history_bulk([
+        ('2024-01-10', {'USD': {'Value': 90.0, 'Nominal': 1}, 'JPY': {'Value': 60.0, 'Nominal': 100}}),
+        ('2024-01-11', {'USD': {'Value': 91.0, 'Nominal': 1}}),
+        ('2024-01-09', {'EUR': {'Value': 99.0, 'Nominal': 1}}),
+    ])
+
+    assert temp_db.get_latest_rates() == {'EUR': 99.0, 'JPY': 0.6, 'USD': 91.0}
+
+
+def test_latest_rates_empty_history(temp_db):
+    assert temp_db.get_latest_rates() == {}
+
+
+def test_compaction_keeps_last_row_of_each_month(temp_db):
+    save_days(temp_db, ['2024-01-09', '2024-01-31', '2024-02-01', '2024-02-28', '2024-05-20', '2024-05-21'])
+    temp_db.save_history_bulk([('2024-01-15', {'EUR': {'Value': 99.0, 'Nominal': 1}})])
+
+    assert temp_db.compact_history(today='2024-06-01', daily_days=30) == 2
+
+    assert temp_db.get_rate_range('USD', '2024-01-01', '2024-12-31') == [
+        ('2024-01-31', 31.0), ('2024-02-28', 28.0), ('2024-05-20', 20.0), ('2024-05-21', 21.0)]
+    assert temp_db.get_rate_range('EUR', '2024-01-01', '2024-12-31') == [('2024-01-15', 99.0)]
+
+
+def test_compaction_is_off_by_default(temp_db):
+    save_days(temp_db, ['2020-01-09', '2020-01-10'])
+
+    assert temp_db.HISTORY_DAILY_DAYS is None
+    assert temp_db.compact_history() == 0
+    assert len(temp_db.get_rate_range('USD', '2020-01-01', '2020-12-31')) == 2
+
+
+def test_retention_removes_old_history_and_marks(temp_db):
+    save_days(temp_db, ['2023-01-10', '2024-05-10'])
+    temp_db.save_history_bulk([], ['2023-01-08'])
+
+    assert temp_db.compact_history(retention_days=365, today='2024-06-01') == 1
+    assert temp_db.get_history_dates('2023-01-01', '2024-12-31') == {'2024-05-10'}
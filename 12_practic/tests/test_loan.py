@@ -0,0 +1,134 @@
+"""
+Тесты расчёта кредита: векторные формулы сверяются с помесячным расчётом.
+"""
+import numpy as np
+import pytest
+
+from loan import (ANNUITY, DIFFERENTIATED, REDUCE_PAYMENT, REDUCE_TERM, SensitivityGrid, build_schedule,
+                  build_schedules, loan_summary)
+
+RTOL = 1e-9
+
+
+def reference_schedule(amount, months, annual_rate, kind=ANNUITY, early_repayments=None, reduce=REDUCE_TERM):
+    """
+    Помесячный график погашения обычным циклом - эталон для сравнения.
+
+    Returns:
+        tuple: Списки платежей, процентов и остатков
+    """
+    rate = annual_rate / 100 / 12
+    early_repayments = early_repayments or {}
+
+    def level(balance, remaining):
+        if kind == DIFFERENTIATED:
+            return balance / remaining
+        if rate == 0:
+            return balance / remaining
+        return balance * rate / (1 - (1 + rate) ** -remaining)
+
+    balance = float(amount)
+    current = level(balance, months)
+    payments, interests, balances = [], [], []
+
+    for month in range(1, months + 1):
+        interest = balance * rate
+        principal = current if kind == DIFFERENTIATED else current - interest
+        if month == months or principal >= balance - 1e-6:
+            principal = balance
+        extra = min(early_repayments.get(month, 0.0), balance - principal)
+        balance -= principal + extra
+
+        payments.append(principal + extra + interest)
+        interests.append(interest)
+        balances.append(balance)
+        if balance <= 1e-6:
+            break
+        if extra and reduce == REDUCE_PAYMENT:
+            current = level(balance, months - month)
+
+    return payments, interests, balances
+
+
+@pytest.mark.parametrize('kind', [ANNUITY, DIFFERENTIATED])
+@pytest.mark.parametrize('amount, months, annual_rate', [
+    (1_000_000, 120, 12.5),
+    (250_000, 12, 0.0),
+    (3_500_000, 360, 7.9),
+    (50_000, 1, 30.0),
+])
+def test_schedule_matches_reference(amount, months, annual_rate, kind):
+    schedule = build_schedule(amount, months, annual_rate, kind)
+    payments, interests, balances = reference_schedule(amount, months, annual_rate, kind)
+
+    assert len(schedule) == len(payments)
+    np.testing.assert_allclose(schedule.payment, payments, rtol=RTOL)
+    np.testing.assert_allclose(schedule.interest, interests, rtol=RTOL, atol=1e-9)
+    np.testing.assert_allclose(schedule.balance, balances, rtol=RTOL, atol=1e-6)
+
+
+@pytest.mark.parametrize('kind', [ANNUITY, DIFFERENTIATED])
+@pytest.mark.parametrize('reduce', [REDUCE_TERM, REDUCE_PAYMENT])
+def test_early_repayments_match_reference(kind, reduce):
+    extras = {6: 100_000.0, 24: 250_000.0, 60: 50_000.0}
+    schedule = build_schedule(1_500_000, 120, 11.0, kind, extras, reduce)
+    payments, interests, balances = reference_schedule(1_500_000, 120, 11.0, kind, extras, reduce)
+
+    assert len(schedule) == len(payments)
+    np.testing.assert_allclose(schedule.payment, payments, rtol=RTOL)
+    np.testing.assert_allclose(schedule.interest, interests, rtol=RTOL, atol=1e-9)
+    np.testing.assert_allclose(schedule.balance, balances, rtol=RTOL, atol=1e-6)
+
+
+@pytest.mark.parametrize('kind', [ANNUITY, DIFFERENTIATED])
+def test_batch_schedules_match_single(kind):
+    amounts = [100_000, 2_000_000, 750_000]
+    months = [12, 240, 60]
+    rates = [0.0, 9.5, 18.0]
+    payments, _, interest, _ = build_schedules(amounts, months, rates, kind)
+
+    for i, (amount, term, rate) in enumerate(zip(amounts, months, rates)):
+        schedule = build_schedule(amount, term, rate, kind)
+        np.testing.assert_allclose(payments[i, :term], schedule.payment, rtol=RTOL)
+        np.testing.assert_allclose(interest[i, :term], schedule.interest, rtol=RTOL, atol=1e-9)
+        assert not payments[i, term:].any()
+
+
+@pytest.mark.parametrize('kind', [ANNUITY, DIFFERENTIATED])
+def test_summary_matches_schedule(kind):
+    result = loan_summary(1_200_000, 84, 14.0, kind)
+    schedule = build_schedule(1_200_000, 84, 14.0, kind)
+
+    assert result.kind == kind
+    assert result.monthly_payment == pytest.approx(schedule.payment[0], rel=RTOL)
+    assert result.last_payment == pytest.approx(schedule.payment[-1], rel=RTOL)
+    assert result.total_payment == pytest.approx(schedule.total_payment, rel=RTOL)
+    assert result.total_interest == pytest.approx(schedule.total_interest, rel=RTOL)
+
+
+@pytest.mark.parametrize('kind', [ANNUITY, DIFFERENTIATED])
+def test_sensitivity_grid_matches_summary(kind):
+    grid = SensitivityGrid()
+    rates, terms = [10.0, 12.0], [60, 120, 180]
+    payments, interest = grid.compute(1_000_000, rates, terms, kind)
+
+    for i, rate in enumerate(rates):
+        for j, term in enumerate(terms):
+            result = loan_summary(1_000_000, term, rate, kind)
+            assert payments[i, j] == pytest.approx(result.monthly_payment, rel=RTOL)
+            assert interest[i, j] == pytest.approx(result.total_interest, rel=RTOL)
+
+
+def test_sensitivity_grid_keeps_kinds_apart():
+    grid = SensitivityGrid()
+    annuity, _ = grid.compute(1_000_000, [12.0], [120], ANNUITY)
+    differentiated, _ = grid.compute(1_000_000, [12.0], [120], DIFFERENTIATED)
+
+    assert annuity[0, 0] != pytest.approx(differentiated[0, 0])
+
+
+def test_invalid_parameters_raise():
+    with pytest.raises(ValueError):
+        build_schedule(0, 12, 10.0)
+    with pytest.raises(ValueError):
+        loan_summary(100_000, 12, 10.0, 'balloon')
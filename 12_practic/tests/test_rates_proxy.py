@@ -0,0 +1,151 @@
+"""
+Тесты прокси курсов: ответ из памяти при недоступном ЦБ РФ и пауза после ошибки.
+"""
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+import rates_proxy
+
+PAYLOAD = {'Date': '2024-01-10T11:30:00+03:00',
+           'Valute': {'USD': {'CharCode': 'USD', 'Nominal': 1, 'Value': 90.0}}}
+
+
+class Upstream:
+    """
+    ЦБ РФ: отвечает 200 с задержкой delay секунд, после break_down()
+    зависает до release() и отвечает 503.
+    """
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.down = False
+        self.released = threading.Event()
+
+    def break_down(self):
+        self.down = True
+
+    def release(self):
+        self.released.set()
+
+    def __call__(self, path, headers):
+        if self.down:
+            self.released.wait(5)
+            return 503, {}, b'unavailable'
+        time.sleep(self.delay)
+        return 200, {'Content-Type': 'application/json'}, json.dumps(PAYLOAD).encode('utf-8')
+
+
+@pytest.fixture
+def upstream(stub_server, api_cache, temp_db):
+    stub = Upstream()
+    server = stub_server(stub)
+    server.stub = stub
+    yield server
+    stub.release()
+
+
+def test_proxy_does_not_change_global_api_url(api_cache):
+    url = api_cache.API_URL
+    rates_proxy.RatesProxy(upstream='http://127.0.0.1:1/daily_json.js')
+
+    assert api_cache.API_URL == url
+
+
+def test_stale_body_is_served_without_waiting_for_upstream(upstream, api_cache):
+    proxy = rates_proxy.RatesProxy(ttl=0, upstream=f"{upstream.url}/daily_json.js")
+
+    async def scenario():
+        body, etag = await proxy.get_rates()
+        upstream.stub.break_down()
+
+        started = time.monotonic()
+        stale = await proxy.get_rates()
+        elapsed = time.monotonic() - started
+        upstream.stub.release()
+        await asyncio.wait([proxy.refresh_task])
+        return body, etag, stale, elapsed
+
+    body, etag, stale, elapsed = asyncio.run(scenario())
+
+    assert json.loads(body) == PAYLOAD
+    assert stale == (body, etag)
+    assert elapsed < 1
+    assert proxy.upstream_requests == 2
+    assert proxy.retry_at > time.monotonic()
+
+
+def test_failed_refresh_is_not_retried_during_backoff(upstream, api_cache):
+    proxy = rates_proxy.RatesProxy(ttl=0, upstream=f"{upstream.url}/daily_json.js")
+    upstream.stub.break_down()
+    upstream.stub.release()
+
+    async def scenario():
+        for _ in range(3):
+            with pytest.raises(Exception):
+                await proxy.get_rates()
+
+    asyncio.run(scenario())
+
+    assert proxy.upstream_requests == 1
+    assert len(upstream.requests) == 1
+
+
+async def http_get(port, headers=None):
+    """Отправляет GET /daily_json.js и возвращает код ответа, заголовки и тело."""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    lines = ['GET /daily_json.js HTTP/1.1', 'Host: 127.0.0.1']
+    lines += [f'{name}: {value}' for name, value in (headers or {}).items()]
+    writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+
+    head, _, body = response.partition(b'\r\n\r\n')
+    status_line, *header_lines = head.decode('latin-1').split('\r\n')
+    parsed = dict(line.split(': ', 1) for line in header_lines)
+    return int(status_line.split()[1]), parsed, body
+
+
+def test_concurrent_requests_share_one_upstream_fetch(stub_server, api_cache, temp_db):
+    upstream = stub_server(Upstream(delay=0.3))
+    proxy = rates_proxy.RatesProxy(upstream=f"{upstream.url}/daily_json.js")
+
+    async def scenario():
+        direct = [proxy.get_rates() for _ in range(50)]
+        server = await proxy.serve('127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        over_http = [http_get(port) for _ in range(20)]
+        async with server:
+            return await asyncio.gather(*direct), await asyncio.gather(*over_http)
+
+    direct, over_http = asyncio.run(scenario())
+
+    assert len(upstream.requests) == 1
+    assert proxy.upstream_requests == 1
+    assert len(set(direct)) == 1
+    assert all(status == 200 and body == direct[0][0] for status, _, body in over_http)
+
+
+def test_matching_etag_gets_304(upstream, api_cache):
+    proxy = rates_proxy.RatesProxy(upstream=f"{upstream.url}/daily_json.js")
+
+    async def scenario():
+        server = await proxy.serve('127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            first = await http_get(port)
+            cached = await http_get(port, {'If-None-Match': first[1]['ETag']})
+            other = await http_get(port, {'If-None-Match': '"other"'})
+        return first, cached, other
+
+    first, cached, other = asyncio.run(scenario())
+
+    assert first[0] == 200 and json.loads(first[2]) == PAYLOAD
+    assert cached[0] == 304 and cached[2] == b''
+    assert cached[1]['ETag'] == first[1]['ETag']
+    assert other[0] == 200 and other[2] == first[2]
+    assert len(upstream.requests) == 1
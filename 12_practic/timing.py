@@ -0,0 +1,91 @@
+"""
+Замер времени действий пользователя по видам работы.
+
+Каждое действие (нажатие кнопки) получает свой ActionTimer; участки кода
+оборачиваются в measure() с категорией - сеть, БД, расчёт или интерфейс.
+В отчёте видно, на что ушло время действия.
+"""
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+NETWORK = 'network'
+DB = 'db'
+CALC = 'calc'
+UI = 'ui'
+
+CATEGORY_NAMES = {
+    NETWORK: 'сеть',
+    DB: 'БД',
+    CALC: 'расчёт',
+    UI: 'интерфейс',
+}
+
+
+class ActionTimer:
+    """
+    Накопитель времени одного действия по категориям.
+
+    Участки могут выполняться в разных потоках (например, сеть и БД -
+    в фоновом потоке, обновление интерфейса - в главном).
+    """
+
+    def __init__(self, name: str):
+        """
+        Инициализация таймера действия.
+
+        Args:
+            name: Название действия для отчёта
+        """
+        self.name = name
+        self.started = time.perf_counter()
+        self.spent: Dict[str, float] = defaultdict(float)
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def measure(self, category: str) -> Iterator[None]:
+        """
+        Замеряет время выполнения блока кода.
+
+        Args:
+            category: Категория работы (NETWORK, DB, CALC, UI)
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self.lock:
+                self.spent[category] += elapsed
+
+    def elapsed(self) -> float:
+        """Время с начала действия, секунд."""
+        return time.perf_counter() - self.started
+
+    def to_dict(self) -> Dict[str, float]:
+        """
+        Возвращает замеры в миллисекундах.
+
+        Returns:
+            dict: Категория -> время, мс; 'total' - полное время действия
+        """
+        with self.lock:
+            result = {category: value * 1000 for category, value in self.spent.items()}
+        result['total'] = self.elapsed() * 1000
+        return result
+
+    def report(self) -> str:
+        """
+        Формирует строку отчёта для лога.
+
+        Returns:
+            str: Например, "Обновить курсы: 812 мс (сеть 790 мс, БД 12 мс, интерфейс 5 мс)"
+        """
+        times = self.to_dict()
+        total = times.pop('total')
+        parts = [f"{CATEGORY_NAMES.get(category, category)} {value:.0f} мс"
+                 for category, value in times.items()]
+        details = f" ({', '.join(parts)})" if parts else ""
+        return f"{self.name}: {total:.0f} мс{details}"